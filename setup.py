@@ -9,6 +9,7 @@ setup(
       author_email='moohaameed.nennouche@gmail.com',
       packages=find_packages('src'),
       package_dir={'': 'src'},
+      package_data={'WaterRocket': ['data/*.csv']},
       url='https://github.com/MohamedNennouche/Water-rocket-launch-simulator',
       keywords='water rocket simulation',
       install_requires=[
@@ -19,6 +20,9 @@ setup(
             'seaborn',
             'tabulate'
       ],
+      extras_require={
+            'excel': ['xlrd']
+      },
       long_description="""WaterRocket is a Python module for simulating the firing of a water rocket, allowing to generate graphs of the evolution during the flight as well as a PDF report of this flight""",
       long_description_content_type='text/markdown',
 
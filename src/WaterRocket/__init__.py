@@ -1,9 +1,19 @@
 __author__ = "Mohamed Nennouche"
 __copyright__ = "Copyright 20XX, WaterRocketPy Team"
 __license__ = "MIT"
-__version__ = "0.1.0"
+__version__ = "0.1.5"
 __maintainer__ = "Mohamed Nennouche"
 __email__ = "moohaaameed.nennouche@gmail.com"
 __status__ = "Production"
 
-from .waterRocket import WaterRocket
\ No newline at end of file
+from .waterRocket import WaterRocket
+from .comparison import graphic_comparison
+from .batch import simulate_batch, summarize_batch
+from .sensitivity import sensitivities
+from .reference import extract_excel_reference, compare_to_reference
+from .estimation import read_telemetry, fit_flight
+from .cache import ArtifactCache, cached_figure, cached_graphic_all, cached_flight_infos, cached_pdf
+from .trajectory import FlightTrajectory
+from .animation import animate_flights
+from .search import design_grid, top_k_designs
+from .wind import wind_ensemble, simulate_wind_batch, safety_radius, graphic_landing_scatter
@@ -0,0 +1,154 @@
+__author__ = "Mohamed Nennouche"
+__copyright__ = "Copyright 20XX, WaterRocketPy Team"
+__license__ = "MIT"
+
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+
+
+def render_frames(trajectory, fps:int=25, speed:float=1.0, figsize:tuple=(8,4.5), dpi:int=80) :
+    """Generator rendering the frames of the replay of a flight
+
+    The static part of the figure (axes, full flight path) is drawn once and saved, each frame restores it and
+    only redraws the animated artists (blitting). The states of the frames are interpolated at a fixed frame
+    rate with FlightTrajectory.state_at.
+
+    Args:
+        - trajectory (FlightTrajectory): Index of the flight (the first flight is animated)
+        - fps (int, optional): Number of frames per second. Defaults to 25.
+        - speed (float, optional): Playback speed (2 plays the flight twice as fast). Defaults to 1.0.
+        - figsize (tuple, optional): Size of the figure (in inches). Defaults to (8,4.5).
+        - dpi (int, optional): Resolution of the frames. Defaults to 80.
+
+    Yields:
+        - frame (array): RGB image of shape (height, width, 3)
+    """
+    landing = trajectory.event_time("landing")[0]
+    if not np.isfinite(landing) :
+        raise ValueError("The flight cannot be animated : its simulation has no valid landing time (the rocket cannot leave the launch ramp or the simulation gives NaN samples)")
+    times = np.append(np.arange(0, landing, speed/fps), landing)
+    state = trajectory.state_at(times, ["x", "y", "Rocket velocity", "Dust"])
+    x, y, velocity, dust = [state[column][0] for column in ("x", "y", "Rocket velocity", "Dust")]
+    n = trajectory.n_samples[0]
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(trajectory.data["x"][0, :n], trajectory.data["y"][0, :n], color=(0.75,0.75,0.8), linewidth=1, label="Flight path")
+    ax.set_xlim(min(0, np.nanmin(x)) - 1, np.nanmax(x) + 1)
+    ax.set_ylim(0, np.nanmax(y)*1.1 + 1)
+    ax.set_title("Flight replay", fontweight='bold', fontsize=14)
+    ax.set_xlabel("Distance (m)", fontsize=12)
+    ax.set_ylabel("Height (m)", fontsize=12)
+    trail, = ax.plot([], [], color=(0.25,0.25,0.5), linewidth=2, animated=True)
+    rocket, = ax.plot([], [], marker="^", markersize=10, color=(0.9,0.4,0.5), animated=True)
+    readout = ax.text(0.02, 0.97, "", transform=ax.transAxes, va="top", family="monospace", animated=True)
+
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+    for i in range(len(times)) :
+        canvas.restore_region(background)
+        trail.set_data(x[:i+1], y[:i+1])
+        rocket.set_data([x[i]], [y[i]])
+        readout.set_text("t = {:6.2f} s\nv = {:6.2f} m/s\nthrust = {:6.2f} N\ny = {:6.2f} m".format(times[i], velocity[i], dust[i], y[i]))
+        for artist in (trail, rocket, readout) :
+            ax.draw_artist(artist)
+        yield np.asarray(canvas.buffer_rgba())[:, :, :3].copy()
+
+def write_animation(frames, fps:int=25, path:str=None, format:str=None) :
+    """Function encoding frames as a GIF (with Pillow) or MP4 (with ffmpeg) file or in-memory buffer
+
+    Args:
+        - frames (iterable): RGB images of the same size
+        - fps (int, optional): Number of frames per second. Defaults to 25.
+        - path (str, optional): Path of the file, None to return the encoded bytes. Defaults to None.
+        - format (str, optional): "gif" or "mp4". Defaults to the extension of path, or "gif".
+
+    Returns:
+        - content (bytes): Encoded animation if path is None, else None
+    """
+    if format is None :
+        format = os.path.splitext(path)[1][1:].lower() if path is not None else "gif"
+    if format not in ("gif", "mp4") :
+        raise ValueError("format must be 'gif' or 'mp4'")
+
+    if format == "gif" :
+        images = [Image.fromarray(frame) for frame in frames]
+        # One palette for all the frames (taken from the last one, where every artist is drawn) instead of one quantization per frame
+        palette = images[-1].quantize(colors=255, method=Image.Quantize.MEDIANCUT)
+        images = [image.quantize(palette=palette, dither=Image.Dither.NONE) for image in images]
+        buffer = io.BytesIO() if path is None else path
+        images[0].save(buffer, format="GIF", save_all=True, append_images=images[1:], duration=int(round(1000/fps)), loop=0)
+        return buffer.getvalue() if path is None else None
+
+    ffmpeg = matplotlib.rcParams['animation.ffmpeg_path']
+    if shutil.which(ffmpeg) is None :
+        raise RuntimeError("ffmpeg is required to write MP4 files (set matplotlib.rcParams['animation.ffmpeg_path'])")
+    frames = iter(frames)
+    first = next(frames)
+    height, width, _ = first.shape
+    with tempfile.TemporaryDirectory() as directory :
+        output = path if path is not None else os.path.join(directory, "animation.mp4")
+        command = [ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", "{}x{}".format(width, height),
+                    "-r", str(fps), "-i", "-", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-vcodec", "libx264", "-pix_fmt", "yuv420p", output]
+        process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        try :
+            process.stdin.write(first.tobytes())
+            for frame in frames :
+                process.stdin.write(frame.tobytes())
+        finally :
+            process.stdin.close()
+            process.wait()
+        if process.returncode != 0 :
+            raise RuntimeError("ffmpeg failed with exit code {}".format(process.returncode))
+        if path is None :
+            with open(output, "rb") as f :
+                return f.read()
+    return None
+
+def animate_flight(rocket, path:str=None, fps:int=25, format:str=None, **options) :
+    """Function rendering the animated replay of a flight (see render_frames for the options)
+
+    Args:
+        - rocket (WaterRocket): Rocket of the flight
+        - path (str, optional): Path of the GIF/MP4 file, None to return the encoded bytes. Defaults to None.
+        - fps (int, optional): Number of frames per second. Defaults to 25.
+        - format (str, optional): "gif" or "mp4". Defaults to the extension of path, or "gif".
+
+    Returns:
+        - content (bytes): Encoded animation if path is None, else None
+    """
+    return write_animation(render_frames(rocket.trajectory(), fps=fps, **options), fps=fps, path=path, format=format)
+
+def _animate_parameters(flight_parameters:dict, path:str, fps:int, format:str, options:dict) :
+    """Worker of animate_flights : the rocket is rebuilt from its parameters in the worker process"""
+    from .waterRocket import WaterRocket
+    return animate_flight(WaterRocket(**flight_parameters), path=path, fps=fps, format=format, **options)
+
+def animate_flights(rockets:list, paths:list=None, fps:int=25, format:str=None, processes:int=None, **options) -> list :
+    """Function rendering the replays of many flights in parallel worker processes
+
+    Args:
+        - rockets (list): WaterRocket objects
+        - paths (list, optional): One path per rocket, None to return the encoded bytes. Defaults to None.
+        - fps (int, optional): Number of frames per second. Defaults to 25.
+        - format (str, optional): "gif" or "mp4". Defaults to the extension of the paths, or "gif".
+        - processes (int, optional): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        - contents (list): Encoded animations (or None for the ones written to a file), in the order of rockets
+    """
+    if paths is None :
+        paths = [None]*len(rockets)
+    with ProcessPoolExecutor(max_workers=processes) as executor :
+        futures = [executor.submit(_animate_parameters, rocket.flight_parameters, path, fps, format, options) for rocket, path in zip(rockets, paths)]
+        return [future.result() for future in futures]
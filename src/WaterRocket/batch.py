@@ -0,0 +1,271 @@
+__author__ = "Mohamed Nennouche"
+__copyright__ = "Copyright 20XX, WaterRocketPy Team"
+__license__ = "MIT"
+
+import numpy as np
+
+# Constructor parameters of WaterRocket with their default values
+DEFAULT_PARAMETERS = {
+    "bottle_volume" : 2,
+    "d_bottle" : 8.9,
+    "d_output" : 0.9,
+    "m_empty_rocket" : 0.5,
+    "Cx" : 0.1,
+    "tilt_angle" : 89,
+    "length_rampe" : 22,
+    "initial_pressure" : 10,
+    "initial_water_volume" : 0.65,
+    "g" : 9.81,
+    "r" : 998,
+    "ra" : 1.2,
+    "Patm" : 101325
+}
+
+COLUMNS = ["Air volume","Air pressure","Time","Ejection velocity","Dust","Rocket mass","Tilt","Rocket velocity","Air resistance","x","y","Acceleration"]
+
+# Number of samples of a simulated flight (before the landing mask)
+N_SAMPLES = 599
+
+# Number of samples of the water and air ejections
+THRUST_SAMPLES = 50
+
+
+def batch_parameters(flights=None, dtype=np.float64, **parameters) -> dict :
+    """Function building the broadcasted parameter arrays of a batch of flights
+
+    Args:
+        - flights (list, optional): WaterRocket objects whose flight_parameters are used. Defaults to None.
+        - dtype (numpy dtype, optional): Floating point type of the arrays. Defaults to np.float64.
+        - **parameters: Constructor parameters of WaterRocket given as scalars or 1D arrays (one value per flight). Missing parameters take their default value
+
+    Returns:
+        - params (dict): dict of 1D arrays of the same length, one entry per constructor parameter
+    """
+    values = dict(DEFAULT_PARAMETERS)
+    if flights is not None :
+        for name in DEFAULT_PARAMETERS :
+            values[name] = [rocket.flight_parameters[name] for rocket in flights]
+    for name, value in parameters.items() :
+        if name not in DEFAULT_PARAMETERS :
+            raise ValueError("Unknown flight parameter '{}'".format(name))
+        values[name] = value
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(values[name], dtype=dtype)) for name in DEFAULT_PARAMETERS])
+    return {name : np.array(array, dtype=dtype) for name, array in zip(DEFAULT_PARAMETERS, arrays)}
+
+def simulate_thrust_batch(flights=None, dtype=np.float64, **parameters) -> dict :
+    """Function simulating the propulsion of many flights at once (the 50 samples of the water and air ejections)
+
+    These quantities do not depend on the trajectory (same equations as calc_air_volume, calc_air_pressure,
+    calc_ejection_velocity, calc_time, calc_dust and calc_mass), they are cheap to compute for huge batches.
+
+    Args:
+        - flights (list, optional): WaterRocket objects to simulate. Defaults to None.
+        - dtype (numpy dtype, optional): Floating point type used for the computation. Defaults to np.float64.
+        - **parameters: Constructor parameters of WaterRocket given as scalars or 1D arrays (one value per flight)
+
+    Returns:
+        - thrust (dict): dict of arrays of shape (number of flights, 50) with the columns "Air volume", "Air pressure", "Time", "Ejection velocity", "Dust" and "Rocket mass", plus "Ramp velocity" (velocity at the end of the launch ramp, one value per flight)
+    """
+    p = batch_parameters(flights, dtype=dtype, **parameters)
+    return _thrust_phase(p, dtype)
+
+def _thrust_phase(p:dict, dtype) -> dict :
+    """Propulsion samples of the flights defined by the parameter arrays p (output of batch_parameters)"""
+    n = len(p["Cx"])
+    g, r, ra, p_atm, m_empty_rocket = p["g"], p["r"], p["ra"], p["Patm"], p["m_empty_rocket"]
+    bottle_volume = p["bottle_volume"]/1000
+    initial_water_volume = p["initial_water_volume"]/1000
+    bottle_section = (p["d_bottle"]**2)*np.pi/40000
+    output_section = (p["d_output"]**2)*np.pi/40000
+    initial_pressure = p["initial_pressure"]*100000
+    # Ramp output speed (same expression as WaterRocket.__init__)
+    ax = (initial_pressure*output_section-(m_empty_rocket+1000*initial_water_volume)*g*np.cos((90-p["tilt_angle"])*np.pi/180))/(m_empty_rocket+1000*initial_water_volume)
+    t_ramp_output = np.sqrt(2*p["length_rampe"]/ax)
+    v_ramp_output = ax * t_ramp_output
+    beta = r*(1 - ((output_section/bottle_section)**2))
+
+    def column(value=0) :
+        return np.full((n, THRUST_SAMPLES), value, dtype=dtype)
+
+    # Air volume
+    air_volume = column()
+    first_air_volume = bottle_volume - initial_water_volume
+    final_air_volume = (initial_pressure + p_atm)*(bottle_volume-initial_water_volume)/p_atm
+    steps = column()[:, :29]
+    steps[:, 0] = first_air_volume
+    steps[:, 1:] = ((bottle_volume-first_air_volume)/29)[:, None]
+    air_volume[:, :29] = np.cumsum(steps, axis=1)
+    air_volume[:, 29] = bottle_volume
+    air_volume[:, 30] = bottle_volume
+    steps = column()[:, :19]
+    steps[:, 0] = bottle_volume
+    steps[:, 1:] = ((final_air_volume-bottle_volume)/19)[:, None]
+    air_volume[:, 30:49] = np.cumsum(steps, axis=1)
+    air_volume[:, 49] = final_air_volume
+
+    # Air pressure
+    air_pressure = ((initial_pressure + p_atm)*(bottle_volume-initial_water_volume))[:, None]/air_volume-p_atm[:, None]
+    # The last sample of the air ejection is at the atmospheric pressure : rounding errors can make it slightly
+    # negative, which gives a NaN ejection velocity and time (clamped as in WaterRocket.calc_pressure)
+    air_pressure[:, 49] = np.maximum(air_pressure[:, 49], 0)
+
+    # Ejection velocity
+    ejection_velocity = column()
+    with np.errstate(invalid='ignore') :
+        ejection_velocity[:, :30] = np.sqrt(2*air_pressure[:, :30]/beta[:, None])
+        ejection_velocity[:, 30:] = np.sqrt(2*air_pressure[:, 30:]/ra[:, None])
+
+    # Time
+    time = column()
+    time[:, :30] = ((2/3)*air_volume[:, :30]**1.5 - ((2/3)*(bottle_volume-initial_water_volume)**1.5)[:, None])/(output_section*np.sqrt(2*initial_pressure*(bottle_volume-initial_water_volume)/beta))[:, None]
+    steps = column()[:, :20]
+    steps[:, 0] = (((2/3)*air_volume[:, 30]**1.5 - (2/3)*(bottle_volume)**1.5)/(output_section*np.sqrt(2*initial_pressure*(bottle_volume-initial_water_volume)/beta)))+time[:, 29]
+    steps[:, 1:] = (air_volume[:, 31:50]-air_volume[:, 30:49])/(output_section[:, None]*((ejection_velocity[:, 31:50]+ejection_velocity[:, 30:49])/2))
+    time[:, 30:] = np.cumsum(steps, axis=1)
+
+    # Dust
+    dust = column()
+    dust[:, :30] = r[:, None]*output_section[:, None]*ejection_velocity[:, :30]**2
+    dust[:, 30:] = ra[:, None]*output_section[:, None]*ejection_velocity[:, 30:]**2
+
+    # Rocket mass
+    rocket_mass = column()
+    rocket_mass[:, :30] = m_empty_rocket[:, None]+r[:, None]*(bottle_volume[:, None]-air_volume[:, :30])
+    rocket_mass[:, 30:] = m_empty_rocket[:, None]
+
+    return {
+        "Air volume" : air_volume,
+        "Air pressure" : air_pressure,
+        "Time" : time,
+        "Ejection velocity" : ejection_velocity,
+        "Dust" : dust,
+        "Rocket mass" : rocket_mass,
+        "Ramp velocity" : v_ramp_output
+    }
+
+def simulate_batch(flights=None, dtype=np.float64, **parameters) -> dict :
+    """Function simulating many flights at once with the equations of WaterRocket.calc_all_caracteristics
+
+    Each quantity is computed for all the flights in a single vectorized pass, the step by step loops only run over
+    the 599 samples of the flight. With dtype=np.float64 the results match the WaterRocket class up to rounding errors.
+
+    Args:
+        - flights (list, optional): WaterRocket objects to simulate. Defaults to None.
+        - dtype (numpy dtype, optional): Floating point type used for the computation (np.float32 for a faster, less precise run). Defaults to np.float64.
+        - **parameters: Constructor parameters of WaterRocket given as scalars or 1D arrays (one value per flight)
+
+    Returns:
+        - data (dict): dict of arrays of shape (number of flights, 599) indexed by the column names of WaterRocket.create_df. The landing mask of create_df is not applied (use data["y"] >= 0)
+    """
+    p = batch_parameters(flights, dtype=dtype, **parameters)
+    n = len(p["Cx"])
+    g, r, ra, m_empty_rocket, Cx = p["g"], p["r"], p["ra"], p["m_empty_rocket"], p["Cx"]
+    bottle_volume = p["bottle_volume"]/1000
+    bottle_section = (p["d_bottle"]**2)*np.pi/40000
+
+    def column(value=0) :
+        return np.full((n, N_SAMPLES), value, dtype=dtype)
+
+    # Propulsion (no ejection after the 50 first samples)
+    thrust = _thrust_phase(p, dtype)
+    air_volume, air_pressure, ejection_velocity, dust = column(), column(), column(), column()
+    for values, name in zip((air_volume, air_pressure, ejection_velocity, dust), ("Air volume", "Air pressure", "Ejection velocity", "Dust")) :
+        values[:, :THRUST_SAMPLES] = thrust[name]
+    rocket_mass = column()
+    rocket_mass[:, :THRUST_SAMPLES] = thrust["Rocket mass"]
+    rocket_mass[:, THRUST_SAMPLES:] = m_empty_rocket[:, None]
+    v_ramp_output = thrust["Ramp velocity"]
+
+    # Time
+    time = column()
+    time[:, :THRUST_SAMPLES] = thrust["Time"]
+    steps = column(0.05)[:, THRUST_SAMPLES:]
+    steps[:, 0] = time[:, 49]
+    steps[:, 1] = 0.01
+    time[:, THRUST_SAMPLES:] = np.cumsum(steps, axis=1)
+
+    # Tilt, rocket velocity and air resistance (step by step, vectorized over the flights)
+    tilt = column()
+    v_rocket = column()
+    air_resistance = column()
+    tilt[:, 0] = p["tilt_angle"]
+    v_rocket[:, 0] = v_ramp_output
+    drag = 0.5*ra*bottle_section*Cx
+    with np.errstate(divide='ignore', invalid='ignore') :
+        # First phase
+        for i in range(29) :
+            dt = time[:, i+1]-time[:, i]
+            tilt[:, i+1] = tilt[:, i]-np.arctan(g*np.cos(tilt[:, i]*np.pi/180)*dt/v_rocket[:, i])*180/np.pi
+            air_resistance[:, i] = drag*(v_rocket[:, i]**2)
+            v_rocket[:, i+1] = v_rocket[:, i]+((dust[:, i] - air_resistance[:, i])/(m_empty_rocket + r*(bottle_volume-air_volume[:, i+1])) - g*np.sin(tilt[:, i+1]*np.pi/180))*dt
+        air_resistance[:, 29] = drag*(v_rocket[:, 29]**2)
+        # Intermediate phase
+        dt = time[:, 30]-time[:, 29]
+        tilt[:, 30] = tilt[:, 29]-np.arctan(g*np.cos(tilt[:, 29]*np.pi/180)*dt/v_rocket[:, 29])*180/np.pi
+        v_rocket[:, 30] = v_rocket[:, 29]+(dust[:, 30]/m_empty_rocket)*dt
+        air_resistance[:, 30] = drag*(v_rocket[:, 30]**2)
+        # Second phase
+        for i in range(30, 49) :
+            dt = time[:, i+1]-time[:, i]
+            tilt[:, i+1] = tilt[:, i]-np.arctan(g*np.cos(tilt[:, i]*np.pi/180)*dt/v_rocket[:, i])*180/np.pi
+            v_rocket[:, i+1] = np.abs(v_rocket[:, i]+((dust[:, i+1]-air_resistance[:, i])/m_empty_rocket-g*np.sin(tilt[:, i+1]*np.pi/180))*dt)
+            air_resistance[:, i+1] = drag*(v_rocket[:, i+1]**2)
+        # Third phase (the time step of the previous sample is used, as in WaterRocket)
+        for i in range(49, 598) :
+            dt = time[:, i]-time[:, i-1]
+            new_tilt = tilt[:, i]-np.arctan((g*np.cos(tilt[:, i]*np.pi/180)*dt)/v_rocket[:, i])*180/np.pi
+            tilt[:, i+1] = np.where(v_rocket[:, i-1] < v_rocket[:, i], -np.abs(new_tilt), new_tilt)
+            v_rocket[:, i+1] = np.abs(v_rocket[:, i]+((dust[:, i]-air_resistance[:, i-1])/m_empty_rocket -g*np.sin(tilt[:, i+1]*np.pi/180))*dt)
+            air_resistance[:, i+1] = drag*(v_rocket[:, i+1]**2)
+
+        # Position
+        dt = column()
+        dt[:, 1:] = np.diff(time, axis=1)
+        x = np.cumsum(v_rocket*dt*np.cos(tilt*np.pi/180), axis=1)
+        y = np.cumsum(v_rocket*dt*np.sin(tilt*np.pi/180), axis=1)
+        x[:, 0] = 0
+        y[:, 0] = 0
+
+        # Acceleration (duplicated value at the phase boundaries)
+        acceleration_y = column()
+        acceleration_y[:, 1:] = np.diff(v_rocket, axis=1)/dt[:, 1:]
+        acceleration_y[:, 30] = acceleration_y[:, 29]
+        acceleration_y[:, 50] = acceleration_y[:, 49]
+
+    values = [air_volume, air_pressure, time, ejection_velocity, dust, rocket_mass, tilt, v_rocket, air_resistance, x, y, acceleration_y]
+    return dict(zip(COLUMNS, values))
+
+def summarize_batch(data:dict) -> dict :
+    """Function computing the flight highlights of show_flight_infos for every flight of a batch
+
+    Args:
+        - data (dict): Output of simulate_batch
+
+    Returns:
+        - summary (dict): dict of 1D arrays (one value per flight): "apogee", "range" (x at the landing, interpolated between the samples), "max_velocity", "max_dust", "max_acceleration", "max_air_resistance", "water_ejection_duration", "air_ejection_duration"
+    """
+    in_flight = data["y"] >= 0
+
+    def masked_max(values) :
+        return np.where(in_flight, values, -np.inf).max(axis=1)
+
+    # Range : x interpolated at the first crossing of the ground, so that it varies continuously with the parameters
+    x, y = data["x"], data["y"]
+    under = y[:, 1:] < 0
+    landed = under.any(axis=1)
+    rows = np.arange(len(y))
+    k = np.argmax(under, axis=1) + 1
+    with np.errstate(divide='ignore', invalid='ignore') :
+        fraction = y[rows, k-1]/(y[rows, k-1] - y[rows, k])
+    landing_x = np.where(landed, x[rows, k-1] + fraction*(x[rows, k] - x[rows, k-1]), masked_max(x))
+
+    return {
+        "apogee" : masked_max(data["y"]),
+        "range" : landing_x,
+        "max_velocity" : masked_max(data["Rocket velocity"]),
+        "max_dust" : masked_max(data["Dust"]),
+        "max_acceleration" : masked_max(data["Acceleration"]),
+        "max_air_resistance" : masked_max(data["Air resistance"]),
+        "water_ejection_duration" : data["Time"][:, 29],
+        "air_ejection_duration" : data["Time"][:, 49]-data["Time"][:, 29]
+    }
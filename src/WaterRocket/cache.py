@@ -0,0 +1,279 @@
+__author__ = "Mohamed Nennouche"
+__copyright__ = "Copyright 20XX, WaterRocketPy Team"
+__license__ = "MIT"
+
+import matplotlib.pyplot as plt
+import contextlib
+import hashlib
+import io
+import json
+import os
+import tempfile
+from importlib import metadata
+
+try :
+    import fcntl
+except ImportError :
+    # No inter-process lock on Windows, the eviction stays safe but can remove slightly too much
+    fcntl = None
+
+# Figures of WaterRocket.graphic_all with the file name used when save_fig=True
+FIGURES = {
+    "graphic_trajectory_with_highlights" : "flight_path.png",
+    "graphic_decomposed_trajectory" : "decomposed_flight_path.png",
+    "graphic_velocity_x" : "velocity_x.png",
+    "graphic_velocity_t" : "velocity_t.png",
+    "graphic_dust" : "dust.png",
+    "graphic_decomposed_dust" : "decomposed_dust.png",
+    "graphic_ejection_water" : "water_ejection.png",
+    "graphic_ejection_air" : "air_ejection.png",
+    "graphic_highlight_table" : "table_highlights.png"
+}
+
+
+def package_version() -> str :
+    """Function returning the installed version of the package (the one of __init__ when it is not installed)"""
+    try :
+        return metadata.version("WaterRocket")
+    except metadata.PackageNotFoundError :
+        from . import __version__
+        return __version__
+
+
+class ArtifactCache :
+
+    def __init__(self, directory:str="./.rocket_cache", max_size:int=500*1024**2) -> None :
+        """Constructor of the ArtifactCache class, an on-disk store of rendered artifacts (figures, texts, PDF reports) addressed by their content
+
+        Entries are written to a temporary file and renamed, so several processes can share the same directory :
+        a reader sees either a complete artifact or nothing. When the store exceeds max_size, the least recently
+        used entries are removed.
+
+        Args:
+            - directory (str, optional): Directory of the store. Defaults to "./.rocket_cache".
+            - max_size (int, optional): Maximal size of the store (in bytes). Defaults to 500 MB.
+        """
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, rocket, artifact:str, options:dict=None) -> str :
+        """Function computing the key of an artifact
+
+        Args:
+            - rocket (WaterRocket or dict): Rocket (or dict of constructor parameters) of the flight
+            - artifact (str): Type of artifact (figure name, "flight_infos", "pdf"...)
+            - options (dict, optional): Rendering options of the artifact. Defaults to None.
+
+        Returns:
+            - key (str): SHA-256 of the canonical flight parameters, artifact type, options and package version
+        """
+        parameters = rocket if isinstance(rocket, dict) else rocket.flight_parameters
+        content = {
+            # 10 and 10.0 describe the same flight
+            "parameters" : {name : float(value) for name, value in parameters.items()},
+            "artifact" : artifact,
+            "options" : options or dict(),
+            "version" : package_version()
+        }
+        return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def path(self, key:str, suffix:str) -> str :
+        """Function returning the file of an entry of the store"""
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key:str, suffix:str="") :
+        """Function reading an artifact from the store
+
+        Returns:
+            - content (bytes): Content of the artifact, None if it is not in the store
+        """
+        path = self.path(key, suffix)
+        try :
+            with open(path, "rb") as f :
+                content = f.read()
+            # Mark as recently used
+            os.utime(path)
+        except FileNotFoundError :
+            return None
+        return content
+
+    def put(self, key:str, content:bytes, suffix:str="") -> None :
+        """Function adding an artifact to the store (atomically) and evicting the least recently used entries if needed"""
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try :
+            with os.fdopen(descriptor, "wb") as f :
+                f.write(content)
+            os.replace(temporary, self.path(key, suffix))
+        except BaseException :
+            if os.path.exists(temporary) :
+                os.remove(temporary)
+            raise
+        self.evict()
+
+    def get_or_create(self, key:str, producer, suffix:str="") -> bytes :
+        """Function returning an artifact from the store, or creating it with producer and storing it
+
+        Args:
+            - key (str): Key of the artifact (see ArtifactCache.key)
+            - producer (function): Function taking the path of a temporary file and writing the artifact in it
+            - suffix (str, optional): File extension of the artifact. Defaults to "".
+
+        Returns:
+            - content (bytes): Content of the artifact
+        """
+        content = self.get(key, suffix)
+        if content is None :
+            with tempfile.TemporaryDirectory() as directory :
+                path = os.path.join(directory, "artifact" + suffix)
+                producer(path)
+                with open(path, "rb") as f :
+                    content = f.read()
+            self.put(key, content, suffix)
+        return content
+
+    def size(self) -> int :
+        """Function returning the size of the store (in bytes)"""
+        return sum(size for _, _, size in self._entries())
+
+    def evict(self) -> None :
+        """Function removing the least recently used entries until the store fits in max_size"""
+        with self._lock() :
+            entries = sorted(self._entries())
+            total = sum(size for _, _, size in entries)
+            for _, path, size in entries :
+                if total <= self.max_size :
+                    break
+                try :
+                    os.remove(path)
+                except FileNotFoundError :
+                    # Already removed by another process
+                    pass
+                total -= size
+
+    def clear(self) -> None :
+        """Function removing all entries of the store"""
+        with self._lock() :
+            for _, path, _ in self._entries() :
+                try :
+                    os.remove(path)
+                except FileNotFoundError :
+                    pass
+
+    def _entries(self) -> list :
+        """List of (last use, path, size) of the entries of the store"""
+        entries = list()
+        for name in os.listdir(self.directory) :
+            if name.endswith(".tmp") or name == ".lock" :
+                continue
+            path = os.path.join(self.directory, name)
+            try :
+                stat = os.stat(path)
+            except FileNotFoundError :
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    @contextlib.contextmanager
+    def _lock(self) :
+        """Inter-process lock of the store (only used by the eviction)"""
+        if fcntl is None :
+            yield
+            return
+        with open(os.path.join(self.directory, ".lock"), "a") as f :
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try :
+                yield
+            finally :
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def cached_figure(rocket, figure:str, cache:ArtifactCache, path_to_fig:str=None, dpi:int=None) -> bytes :
+    """Function rendering a figure of WaterRocket as PNG, or taking it from the cache
+
+    Args:
+        - rocket (WaterRocket): Rocket of the flight
+        - figure (str): Name of the graphic method (see FIGURES)
+        - cache (ArtifactCache): Store of the artifacts
+        - path_to_fig (str, optional): Path where the PNG is also written. Defaults to None.
+        - dpi (int, optional): Resolution of the image. Defaults to matplotlib's default (150 for the highlight table, as in graphic_highlight_table).
+
+    Returns:
+        - content (bytes): PNG image
+    """
+    if figure not in FIGURES :
+        raise ValueError("figure must be one of {}".format(list(FIGURES)))
+    if dpi is None and figure == "graphic_highlight_table" :
+        dpi = 150
+
+    def producer(path) :
+        getattr(rocket, figure)(save_fig=False, show_figure=False)
+        plt.savefig(path, format="png", bbox_inches='tight', dpi=dpi)
+        plt.close()
+
+    content = cache.get_or_create(cache.key(rocket, figure, {"dpi" : dpi}), producer, ".png")
+    if path_to_fig is not None :
+        with open(path_to_fig, "wb") as f :
+            f.write(content)
+    return content
+
+def cached_graphic_all(rocket, cache:ArtifactCache, directory:str="./img") -> None :
+    """Function writing all the figures of graphic_all in directory (with the names used by save_fig=True), rendering only the ones missing from the cache
+
+    Args:
+        - rocket (WaterRocket): Rocket of the flight
+        - cache (ArtifactCache): Store of the artifacts
+        - directory (str, optional): Directory of the images. Defaults to "./img".
+    """
+    os.makedirs(directory, exist_ok=True)
+    for figure, name in FIGURES.items() :
+        cached_figure(rocket, figure, cache, path_to_fig=os.path.join(directory, name))
+
+def cached_flight_infos(rocket, cache:ArtifactCache) -> str :
+    """Function returning the text summary of show_flight_infos, computed or taken from the cache
+
+    Args:
+        - rocket (WaterRocket): Rocket of the flight
+        - cache (ArtifactCache): Store of the artifacts
+
+    Returns:
+        - text (str): Summary of the flight as written by show_flight_infos(save_in_text=True)
+    """
+    def producer(path) :
+        with contextlib.redirect_stdout(io.StringIO()) :
+            rocket.show_flight_infos(save_in_text=True, path_to_text=path)
+
+    return cache.get_or_create(cache.key(rocket, "flight_infos"), producer, ".txt").decode("utf-8")
+
+def cached_pdf(rocket, cache:ArtifactCache, path_to_save_pdf:str="report.pdf", author:str="No one") -> bytes :
+    """Function generating the PDF report of createPDF, or taking it from the cache
+
+    On a cache miss the report is built in a temporary working directory, so the ./img directory of createPDF
+    is never shared between worker processes. The working directory is changed for the whole process : use
+    process workers (e.g. ProcessPoolExecutor), not threads, to generate reports in parallel.
+
+    Args:
+        - rocket (WaterRocket): Rocket of the flight
+        - cache (ArtifactCache): Store of the artifacts
+        - path_to_save_pdf (str, optional): Path where the report is written, None to only return it. Defaults to "report.pdf".
+        - author (str, optional): The author name to add in the report. Defaults to "No one".
+
+    Returns:
+        - content (bytes): PDF report
+    """
+    def producer(path) :
+        path = os.path.abspath(path)
+        working_directory = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory :
+            os.chdir(directory)
+            try :
+                rocket.createPDF(path_to_save_pdf=path, saveImgs=False, author=author)
+            finally :
+                os.chdir(working_directory)
+                plt.close('all')
+
+    content = cache.get_or_create(cache.key(rocket, "pdf", {"author" : author}), producer, ".pdf")
+    if path_to_save_pdf is not None :
+        with open(path_to_save_pdf, "wb") as f :
+            f.write(content)
+    return content
@@ -0,0 +1,166 @@
+__author__ = "Mohamed Nennouche"
+__copyright__ = "Copyright 20XX, WaterRocketPy Team"
+__license__ = "MIT"
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+import os
+
+# Columns plotted for each kind of comparison figure (abscissa, ordinate)
+COMPARISON_KINDS = {
+    "trajectory" : ("x", "y"),
+    "velocity" : ("Time", "Rocket velocity"),
+    "thrust" : ("Time", "Dust")
+}
+
+COMPARISON_LABELS = {
+    "x" : "Distance (m)",
+    "y" : "Height (m)",
+    "Time" : "Time (s)",
+    "Rocket velocity" : "Speed (m/s)",
+    "Dust" : "Dust (N)"
+}
+
+# Above this number of flights, mode="auto" switches from lines to density
+MAX_LINES = 2000
+
+
+def flights_to_arrays(flights, columns:list) -> dict :
+    """Function stacking the simulated columns of several flights into 2D arrays
+
+    Args:
+        - flights (list or dict): Either a list of WaterRocket objects or a dict of 2D arrays (one row per flight) indexed by column name
+        - columns (list): Names of the columns to extract (as in WaterRocket.create_df)
+
+    Returns:
+        - arrays (dict): dict of arrays of shape (number of flights, number of samples). Samples after the landing (y < 0) are set to NaN
+    """
+    if isinstance(flights, dict) :
+        arrays = {column : np.atleast_2d(np.asarray(flights[column], dtype=float)) for column in set(columns) | {"y"}}
+        landed = ~(arrays["y"] >= 0)
+        for column in arrays :
+            arrays[column] = np.where(landed, np.nan, arrays[column])
+        return arrays
+
+    frames = [rocket.create_df(save_as_CSV=False) for rocket in flights]
+    n_samples = max(len(frame) for frame in frames)
+    arrays = dict()
+    for column in columns :
+        arrays[column] = np.full((len(frames), n_samples), np.nan)
+        for i, frame in enumerate(frames) :
+            arrays[column][i, :len(frame)] = frame[column].to_numpy()
+    return arrays
+
+def graphic_comparison(
+    flights,
+    kind:str="trajectory",
+    color_by=None,
+    mode:str="auto",
+    bins:int=400,
+    cmap:str="viridis",
+    apogee_markers:bool=True,
+    save_fig:bool=False,
+    show_figure:bool=False,
+    parameters:dict=None) -> None :
+    """Function that overlays the flights of a whole sweep in a single figure
+
+    Lines are drawn as one LineCollection instead of one plt.plot per flight, and beyond MAX_LINES flights the
+    samples are aggregated in a rasterized 2D histogram so that 10^5 flights still render in a few seconds.
+
+    Args:
+        - flights (list or dict): Either a list of WaterRocket objects or a dict of 2D arrays (one row per flight) indexed by column name
+        - kind (str, optional): "trajectory" (y vs x), "velocity" (velocity vs time) or "thrust" (dust vs time). Defaults to "trajectory".
+        - color_by (str or array, optional): Flight parameter name (see WaterRocket.flight_parameters) or one value per flight used to color the flights. Defaults to None.
+        - mode (str, optional): "lines", "density" or "auto". Defaults to "auto".
+        - bins (int, optional): Number of bins along each axis in density mode. Defaults to 400.
+        - cmap (str, optional): Matplotlib colormap. Defaults to "viridis".
+        - apogee_markers (bool, optional): Mark the apogee of every flight. Defaults to True.
+        - save_fig (bool, optional): Define if you would save the image of plot or not. Defaults to False.
+        - show_figure (bool, optional): Define if you would show the plot or not. Defaults to False.
+        - parameters (dict, optional): Flight parameters of a dict of flights (e.g. the keyword arguments given to simulate_batch or the output of batch_parameters), used by color_by. Defaults to None.
+    """
+    if kind not in COMPARISON_KINDS :
+        raise ValueError("kind must be one of {}".format(list(COMPARISON_KINDS)))
+    if mode not in ("auto", "lines", "density") :
+        raise ValueError("mode must be 'auto', 'lines' or 'density'")
+    column_x, column_y = COMPARISON_KINDS[kind]
+    data = flights_to_arrays(flights, [column_x, column_y, "y"])
+    data_x, data_y = data[column_x], data[column_y]
+    n_flights = data_x.shape[0]
+
+    # Values used to color the flights
+    if isinstance(color_by, str) :
+        if isinstance(flights, dict) :
+            source = parameters if parameters is not None and color_by in parameters else flights
+            if color_by not in source :
+                raise ValueError("color_by='{}' : the flights have no such parameter, pass parameters=dict of parameter arrays (e.g. the output of batch_parameters) or color_by=array of one value per flight".format(color_by))
+            color_values = np.broadcast_to(np.asarray(source[color_by], dtype=float), (n_flights,))
+        else :
+            color_values = np.array([rocket.flight_parameters[color_by] for rocket in flights], dtype=float)
+        color_label = color_by
+    elif color_by is not None :
+        color_values = np.asarray(color_by, dtype=float)
+        color_label = None
+    else :
+        color_values = None
+    if mode == "auto" :
+        mode = "lines" if n_flights <= MAX_LINES else "density"
+
+    plt.figure(figsize=(16,6))
+    ax = plt.gca()
+    font = {'family': 'sans-serif',
+        'color':  'black',
+        'weight': 'bold',
+        'size': 16,
+        }
+
+    if mode == "lines" :
+        segments = list()
+        for i in range(n_flights) :
+            valid = ~(np.isnan(data_x[i]) | np.isnan(data_y[i]))
+            segments.append(np.column_stack((data_x[i, valid], data_y[i, valid])))
+        lines = LineCollection(segments, linewidths=1, alpha=0.6 if n_flights > 1 else 1, cmap=cmap)
+        if color_values is not None :
+            lines.set_array(color_values)
+        ax.add_collection(lines)
+        ax.autoscale_view()
+        mappable = lines if color_values is not None else None
+    else :
+        valid = ~(np.isnan(data_x) | np.isnan(data_y))
+        points_x, points_y = data_x[valid], data_y[valid]
+        counts, edges_x, edges_y = np.histogram2d(points_x, points_y, bins=bins)
+        if color_values is not None :
+            # Mean parameter value of the samples falling in each cell
+            weights = np.broadcast_to(color_values[:, None], data_x.shape)[valid]
+            sums, _, _ = np.histogram2d(points_x, points_y, bins=[edges_x, edges_y], weights=weights)
+            with np.errstate(invalid='ignore') :
+                image = sums/counts
+        else :
+            image = np.where(counts > 0, np.log10(np.maximum(counts, 1)), np.nan)
+        mappable = ax.imshow(image.T, origin='lower', aspect='auto', interpolation='nearest', cmap=cmap,
+                            extent=(edges_x[0], edges_x[-1], edges_y[0], edges_y[-1]))
+        if color_values is None :
+            color_label = "log10(samples)"
+
+    if apogee_markers :
+        apogee = np.nanargmax(np.where(np.isnan(data["y"]), -np.inf, data["y"]), axis=1)
+        rows = np.arange(n_flights)
+        plt.scatter(data_x[rows, apogee], data_y[rows, apogee], label='Apogee', marker="x", s=30 if n_flights < 100 else 2,
+                    color=(0.25,0.25,0.5), rasterized=n_flights > MAX_LINES, zorder=3)
+        plt.legend()
+    if mappable is not None :
+        colorbar = plt.colorbar(mappable, ax=ax)
+        if color_label is not None :
+            colorbar.set_label(color_label, fontsize=14)
+
+    plt.title("Comparison of {} flights ({})".format(n_flights, kind), fontdict=font)
+    plt.xlabel(COMPARISON_LABELS[column_x], fontsize=14)
+    plt.ylabel(COMPARISON_LABELS[column_y], fontsize=14)
+
+    if save_fig :
+        if not os.path.isdir("./img") :
+            os.mkdir("./img")
+        plt.savefig("./img/comparison_{}.png".format(kind), bbox_inches='tight')
+    if show_figure :
+        plt.show()
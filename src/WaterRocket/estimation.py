@@ -0,0 +1,175 @@
+__author__ = "Mohamed Nennouche"
+__copyright__ = "Copyright 20XX, WaterRocketPy Team"
+__license__ = "MIT"
+
+import numpy as np
+import pandas as pd
+
+from .batch import DEFAULT_PARAMETERS, simulate_batch
+
+# Damping factors tried at each iteration of the fit (relative to the current damping)
+DAMPING_FACTORS = [0.01, 0.1, 1, 10, 100]
+
+
+def read_telemetry(path_to_csv:str, time_column:str="time", altitude_column:str="altitude", acceleration_column:str="acceleration") -> pd.DataFrame :
+    """Function reading a recorded flight (altimeter and optionally accelerometer) from a CSV file
+
+    Args:
+        - path_to_csv (str): Path of the CSV file
+        - time_column (str, optional): Name of the time column (in s). Defaults to "time".
+        - altitude_column (str, optional): Name of the altitude column (in m, relative to the launch pad). Defaults to "altitude".
+        - acceleration_column (str, optional): Name of the acceleration column (in m/s²), ignored if absent. Defaults to "acceleration".
+
+    Returns:
+        - telemetry (DataFrame): Pandas DataFrame with the columns "Time", "y" and optionally "Acceleration" (names of WaterRocket.create_df), sorted by time
+    """
+    data = pd.read_csv(path_to_csv)
+    columns = {time_column : "Time", altitude_column : "y"}
+    if acceleration_column in data.columns :
+        columns[acceleration_column] = "Acceleration"
+    telemetry = data[list(columns)].rename(columns=columns).dropna(subset=["Time"])
+    return telemetry.sort_values("Time").reset_index(drop=True)
+
+def fit_flight(
+    telemetry,
+    rocket=None,
+    parameters:list=None,
+    bounds:dict=None,
+    acceleration_weight:float=1.0,
+    gravity_compensated:bool=False,
+    relative_step:float=1e-3,
+    max_iterations:int=30,
+    tolerance:float=1e-8) -> dict :
+    """Function fitting flight parameters (Cx by default) to a recorded flight by least squares
+
+    The simulated altitude (and acceleration if recorded) is interpolated at the recorded times. The fit is a
+    Levenberg-Marquardt loop where each iteration simulates, in a single call to simulate_batch, several damped
+    steps together with the central differences of each of them. Fitting d_output gives the effective nozzle
+    diameter, its ratio to the nominal section is returned as the discharge coefficient of the nozzle.
+
+    Args:
+        - telemetry (DataFrame or str): Output of read_telemetry or path of a CSV file readable by read_telemetry
+        - rocket (WaterRocket, optional): Rocket giving the values of the parameters that are not fitted and the starting point. Defaults to the default WaterRocket.
+        - parameters (list, optional): Names of the constructor parameters to fit (e.g. "Cx", "m_empty_rocket", "d_output"). Defaults to ["Cx"].
+        - bounds (dict, optional): (lower, upper) bounds of the fitted parameters. Defaults to (0, inf) for every parameter.
+        - acceleration_weight (float, optional): Weight of the acceleration residuals (in m per m/s²) relative to the altitude residuals. Defaults to 1.0.
+        - gravity_compensated (bool, optional): False if the recorded acceleration is the raw reading of an accelerometer along the flight path (specific force, about -air resistance/mass when coasting), True if gravity has been removed (dv/dt, the "Acceleration" column of create_df). Defaults to False.
+        - relative_step (float, optional): Step of the central differences relative to the parameter value. Defaults to 1e-3.
+        - max_iterations (int, optional): Maximal number of iterations. Defaults to 30.
+        - tolerance (float, optional): Relative decrease of the cost under which the fit stops. Defaults to 1e-8.
+
+    Returns:
+        - result (dict): "parameters" (fitted values), "flight_parameters" (all constructor parameters), "rms_altitude" (m), "rms_acceleration" (m/s², if recorded), "discharge_coefficient" (if d_output is fitted), "iterations" and "simulations"
+    """
+    if isinstance(telemetry, str) :
+        telemetry = read_telemetry(telemetry)
+    if parameters is None :
+        parameters = ["Cx"]
+    for name in parameters :
+        if name not in DEFAULT_PARAMETERS :
+            raise ValueError("Unknown flight parameter '{}'".format(name))
+    base = dict(DEFAULT_PARAMETERS) if rocket is None else dict(rocket.flight_parameters)
+    bounds = dict() if bounds is None else bounds
+    lower = np.array([bounds.get(name, (0, np.inf))[0] for name in parameters], dtype=float)
+    upper = np.array([bounds.get(name, (0, np.inf))[1] for name in parameters], dtype=float)
+
+    measured_time = telemetry["Time"].to_numpy(dtype=float)
+    measured_y = telemetry["y"].to_numpy(dtype=float)
+    use_acceleration = "Acceleration" in telemetry.columns and acceleration_weight > 0
+    if use_acceleration :
+        measured_acceleration = telemetry["Acceleration"].to_numpy(dtype=float)
+        valid_acceleration = np.isfinite(measured_acceleration)
+    valid_y = np.isfinite(measured_y)
+    g = float(base["g"])
+    n_parameters = len(parameters)
+    simulations = 0
+
+    def residuals(points:np.ndarray) -> np.ndarray :
+        """Residuals of the flights defined by the rows of points (one row per flight)"""
+        nonlocal simulations
+        values = {name : points[:, j] for j, name in enumerate(parameters)}
+        with np.errstate(all='ignore') :
+            data = simulate_batch(**{**base, **values})
+        simulations += len(points)
+        result = list()
+        for i in range(len(points)) :
+            # The ground stops the rocket, the simulation keeps going below 0
+            y = np.interp(measured_time, data["Time"][i], np.maximum(data["y"][i], 0))
+            flight_residuals = (y - measured_y)[valid_y]
+            if use_acceleration :
+                simulated = data["Acceleration"][i]
+                if not gravity_compensated :
+                    # An accelerometer does not feel the gravity : it reads dv/dt + g*sin(tilt)
+                    simulated = simulated + g*np.sin(data["Tilt"][i]*np.pi/180)
+                acceleration = np.interp(measured_time, data["Time"][i], simulated)
+                flight_residuals = np.concatenate((flight_residuals, acceleration_weight*(acceleration - measured_acceleration)[valid_acceleration]))
+            result.append(flight_residuals)
+        return np.nan_to_num(np.array(result), nan=1e6)
+
+    def with_perturbations(points:np.ndarray) -> tuple :
+        """Rows of points followed, for each of them, by its +h/-h perturbations of every parameter"""
+        steps = relative_step*np.where(points != 0, np.abs(points), 1)
+        rows = [points]
+        for j in range(n_parameters) :
+            plus, minus = points.copy(), points.copy()
+            plus[:, j] += steps[:, j]
+            minus[:, j] -= steps[:, j]
+            rows += [plus, minus]
+        return np.concatenate(rows), steps
+
+    def evaluate(points:np.ndarray) :
+        """Residuals and Jacobians of several candidate points in a single batch"""
+        n_points = len(points)
+        all_points, steps = with_perturbations(points)
+        all_residuals = residuals(all_points)
+        values = all_residuals[:n_points]
+        jacobians = np.empty((n_points, values.shape[1], n_parameters))
+        for j in range(n_parameters) :
+            plus = all_residuals[(1 + 2*j)*n_points:(2 + 2*j)*n_points]
+            minus = all_residuals[(2 + 2*j)*n_points:(3 + 2*j)*n_points]
+            jacobians[:, :, j] = (plus - minus)/(2*steps[:, j, None])
+        return values, jacobians
+
+    point = np.array([float(base[name]) for name in parameters])
+    values, jacobians = evaluate(point[None, :])
+    current, jacobian = values[0], jacobians[0]
+    cost = np.sum(current**2)
+    damping = 1e-3
+    iterations = 0
+    for iterations in range(1, max_iterations + 1) :
+        normal = jacobian.T @ jacobian
+        gradient = jacobian.T @ current
+        candidates = list()
+        for factor in DAMPING_FACTORS :
+            matrix = normal + damping*factor*np.diag(np.maximum(np.diag(normal), 1e-12))
+            step = np.linalg.lstsq(matrix, -gradient, rcond=None)[0]
+            candidates.append(np.clip(point + step, lower, upper))
+        candidates = np.array(candidates)
+        values, jacobians = evaluate(candidates)
+        costs = np.sum(values**2, axis=1)
+        best = np.argmin(costs)
+        if costs[best] >= cost :
+            damping *= 100
+            if damping > 1e10 :
+                break
+            continue
+        decrease = (cost - costs[best])/max(cost, 1e-300)
+        point, current, jacobian, cost = candidates[best], values[best], jacobians[best], costs[best]
+        damping = max(damping*DAMPING_FACTORS[best], 1e-12)
+        if decrease < tolerance :
+            break
+
+    fitted = {name : float(point[j]) for j, name in enumerate(parameters)}
+    n_altitude = int(valid_y.sum())
+    result = {
+        "parameters" : fitted,
+        "flight_parameters" : {**base, **fitted},
+        "rms_altitude" : float(np.sqrt(np.mean(current[:n_altitude]**2))),
+        "iterations" : iterations,
+        "simulations" : simulations
+    }
+    if use_acceleration :
+        result["rms_acceleration"] = float(np.sqrt(np.mean((current[n_altitude:]/acceleration_weight)**2)))
+    if "d_output" in fitted :
+        result["discharge_coefficient"] = (fitted["d_output"]/base["d_output"])**2
+    return result
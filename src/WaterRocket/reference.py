@@ -0,0 +1,177 @@
+__author__ = "Mohamed Nennouche"
+__copyright__ = "Copyright 20XX, WaterRocketPy Team"
+__license__ = "MIT"
+
+import numpy as np
+import pandas as pd
+import os
+import time
+
+from .waterRocket import WaterRocket
+from .batch import DEFAULT_PARAMETERS, COLUMNS, N_SAMPLES, simulate_batch
+
+# Reference trajectories extracted from simulateurV1.xls
+REFERENCE_FIXTURE = os.path.join(os.path.dirname(__file__), "data", "excel_reference.csv")
+
+# Cells (row, column) of the "Etude analytique" sheet holding the flight parameters
+EXCEL_PARAMETER_CELLS = {
+    "bottle_volume" : (3, 2),
+    "d_bottle" : (4, 2),
+    "d_output" : (5, 2),
+    "m_empty_rocket" : (6, 2),
+    "Cx" : (7, 2),
+    "tilt_angle" : (3, 4),
+    "length_rampe" : (4, 4),
+    "initial_pressure" : (6, 4),
+    "initial_water_volume" : (7, 4)
+}
+
+# Columns of the "Matrice de calcul" sheet for each column of WaterRocket.create_df
+EXCEL_COLUMNS = {
+    "Air volume" : 1,
+    "Air pressure" : 2,
+    "Time" : 3,
+    "Ejection velocity" : 4,
+    "Dust" : 5,
+    "Tilt" : 6,
+    "Rocket mass" : 7,
+    "Rocket velocity" : 8,
+    "Air resistance" : 9,
+    "x" : 10,
+    "y" : 11,
+    "Acceleration" : 16
+}
+# First row of the flight in the "Matrice de calcul" sheet
+EXCEL_FIRST_ROW = 4
+
+
+def extract_excel_reference(path_to_xls:str="simulateurV1.xls", path_to_fixture:str=REFERENCE_FIXTURE, scenario:str="simulateurV1") -> pd.DataFrame :
+    """Function extracting the trajectory computed by the Excel simulator into the reference fixture
+
+    The workbook only stores the values of its last computation, so each scenario is obtained by setting the
+    parameters in Excel, saving the workbook and extracting it under a new scenario name. Reading .xls files
+    requires the optional xlrd package.
+
+    Args:
+        - path_to_xls (str, optional): Path of the Excel simulator. Defaults to "simulateurV1.xls".
+        - path_to_fixture (str, optional): Path of the CSV fixture, the scenario is added to it (or replaced). Defaults to REFERENCE_FIXTURE.
+        - scenario (str, optional): Name of the scenario. Defaults to "simulateurV1".
+
+    Returns:
+        - reference (DataFrame): Pandas DataFrame containing all the scenarios of the fixture
+    """
+    try :
+        import xlrd
+    except ImportError as error :
+        raise ImportError("xlrd is required to read the Excel simulator (pip install xlrd)") from error
+
+    workbook = xlrd.open_workbook(path_to_xls)
+    inputs = workbook.sheet_by_name("Etude analytique")
+    matrix = workbook.sheet_by_name("Matrice de calcul")
+
+    parameters = dict(DEFAULT_PARAMETERS)
+    for name, (row, col) in EXCEL_PARAMETER_CELLS.items() :
+        parameters[name] = float(inputs.cell_value(row, col))
+
+    data = pd.DataFrame({"Scenario" : scenario, "Sample" : np.arange(N_SAMPLES)})
+    for name, value in parameters.items() :
+        data[name] = value
+    for column, col in EXCEL_COLUMNS.items() :
+        values = matrix.col_values(col, EXCEL_FIRST_ROW, EXCEL_FIRST_ROW + N_SAMPLES)
+        # Empty cells of the workbook become NaN
+        data[column] = [value if isinstance(value, float) else np.nan for value in values]
+
+    if os.path.isfile(path_to_fixture) :
+        reference = pd.read_csv(path_to_fixture)
+        reference = pd.concat([reference[reference["Scenario"] != scenario], data], ignore_index=True)
+    else :
+        os.makedirs(os.path.dirname(os.path.abspath(path_to_fixture)), exist_ok=True)
+        reference = data
+    reference.to_csv(path_to_fixture, index=False)
+    return reference
+
+def engine_waterrocket(parameters:dict) -> dict :
+    """Engine running the WaterRocket class (reference implementation of the package)"""
+    rocket = WaterRocket(**parameters)
+    values = rocket.calc_all_caracteristics()
+    # calc_all_caracteristics returns the ejection velocity before the time (unlike the columns of create_df)
+    names = ["Air volume","Air pressure","Ejection velocity","Time","Dust","Rocket mass","Tilt","Rocket velocity","Air resistance","x","y","Acceleration"]
+    return {name : np.asarray(value, dtype=float) for name, value in zip(names, values)}
+
+def engine_batch(parameters:dict) -> dict :
+    """Engine running simulate_batch in double precision"""
+    data = simulate_batch(**parameters)
+    return {column : data[column][0] for column in COLUMNS}
+
+def engine_batch_float32(parameters:dict) -> dict :
+    """Engine running simulate_batch in single precision"""
+    data = simulate_batch(dtype=np.float32, **parameters)
+    return {column : data[column][0].astype(float) for column in COLUMNS}
+
+ENGINES = {
+    "WaterRocket" : engine_waterrocket,
+    "batch" : engine_batch,
+    "batch float32" : engine_batch_float32
+}
+
+def landing_time(time, y) -> float :
+    """Function interpolating the time of the first crossing of the ground after the launch
+
+    Args:
+        - time (array): Time samples (in s)
+        - y (array): Height samples (in m)
+
+    Returns:
+        - time (float): Landing time (in s), NaN if the rocket never goes under the ground
+    """
+    time, y = np.asarray(time, dtype=float), np.asarray(y, dtype=float)
+    under = np.flatnonzero(y[1:] < 0)
+    if len(under) == 0 :
+        return np.nan
+    k = under[0] + 1
+    return time[k-1] + y[k-1]/(y[k-1] - y[k])*(time[k] - time[k-1])
+
+def compare_to_reference(path_to_fixture:str=REFERENCE_FIXTURE, engines:dict=None, repeat:int=3) -> pd.DataFrame :
+    """Function comparing the simulation engines to the Excel reference trajectories
+
+    Args:
+        - path_to_fixture (str, optional): Path of the CSV fixture created by extract_excel_reference. Defaults to REFERENCE_FIXTURE.
+        - engines (dict, optional): Engines to evaluate, each one takes the dict of constructor parameters and returns a dict of 599 samples per column. Defaults to ENGINES.
+        - repeat (int, optional): Number of runs of each engine, the best runtime is kept. Defaults to 3.
+
+    Returns:
+        - report (DataFrame): Pandas DataFrame indexed by (scenario, engine, column) with the maximal and RMS errors over the samples where the reference rocket is above the ground, the number of compared samples, the apogee and landing time differences of the engine (engine - reference) and its runtime (in seconds)
+    """
+    if engines is None :
+        engines = ENGINES
+    reference = pd.read_csv(path_to_fixture)
+    rows = list()
+    for scenario, expected in reference.groupby("Scenario", sort=False) :
+        expected = expected.sort_values("Sample")
+        parameters = {name : float(expected[name].iloc[0]) for name in DEFAULT_PARAMETERS}
+        for engine_name, engine in engines.items() :
+            runtimes = list()
+            for _ in range(repeat) :
+                start = time.perf_counter()
+                with np.errstate(all='ignore') :
+                    result = engine(parameters)
+                runtimes.append(time.perf_counter() - start)
+            # Both trajectories keep going under the ground, only the samples of the reference flight are compared
+            in_flight = expected["y"].to_numpy() >= 0
+            apogee_error = np.nanmax(np.where(np.asarray(result["y"], dtype=float) >= 0, result["y"], np.nan)) - np.nanmax(expected["y"].to_numpy()[in_flight])
+            landing_error = landing_time(result["Time"], result["y"]) - landing_time(expected["Time"], expected["y"])
+            for column in EXCEL_COLUMNS :
+                errors = (np.asarray(result[column], dtype=float) - expected[column].to_numpy())[in_flight]
+                errors = errors[np.isfinite(errors)]
+                rows.append({
+                    "Scenario" : scenario,
+                    "Engine" : engine_name,
+                    "Column" : column,
+                    "Max error" : np.abs(errors).max() if len(errors) else np.nan,
+                    "RMS error" : np.sqrt(np.mean(errors**2)) if len(errors) else np.nan,
+                    "Samples" : len(errors),
+                    "Apogee error (m)" : apogee_error,
+                    "Landing time error (s)" : landing_error,
+                    "Runtime (s)" : min(runtimes)
+                })
+    return pd.DataFrame(rows).set_index(["Scenario", "Engine", "Column"])
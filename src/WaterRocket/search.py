@@ -0,0 +1,124 @@
+__author__ = "Mohamed Nennouche"
+__copyright__ = "Copyright 20XX, WaterRocketPy Team"
+__license__ = "MIT"
+
+import numpy as np
+import pandas as pd
+import itertools
+
+from .batch import DEFAULT_PARAMETERS, batch_parameters, simulate_batch, simulate_thrust_batch, summarize_batch
+
+# Largest time step after the end of the propulsion (slack of the Euler integration of the coasting phase)
+COAST_STEP = 0.05
+
+
+def design_grid(**values) -> pd.DataFrame :
+    """Function building the catalogue of all the combinations of some constructor parameters
+
+    Args:
+        - **values: Constructor parameters of WaterRocket given as lists of values (e.g. bottle_volume=[1, 1.5, 2])
+
+    Returns:
+        - candidates (DataFrame): Pandas DataFrame with one column per parameter and one row per combination
+    """
+    for name in values :
+        if name not in DEFAULT_PARAMETERS :
+            raise ValueError("Unknown flight parameter '{}'".format(name))
+    return pd.DataFrame(list(itertools.product(*[np.atleast_1d(value) for value in values.values()])), columns=list(values))
+
+def apogee_upper_bound(flights=None, **parameters) -> np.ndarray :
+    """Function computing an upper bound of the apogee of many flights from their propulsion only
+
+    The rocket is accelerated by the whole dust of the ejections with neither air resistance nor gravity, and
+    climbs vertically during the propulsion. The apogee of the drag-free coasting from the burnout velocity is
+    added (with the slack of one integration step).
+
+    Args:
+        - flights (list, optional): WaterRocket objects. Defaults to None.
+        - **parameters: Constructor parameters of WaterRocket given as scalars or 1D arrays (one value per flight)
+
+    Returns:
+        - bound (array): Upper bound of the apogee (in m) of each flight, -inf for the flights that cannot leave the launch ramp
+    """
+    p = batch_parameters(flights, **parameters)
+    thrust = simulate_thrust_batch(**p)
+    g = p["g"]
+    time, mass = thrust["Time"], thrust["Rocket mass"]
+    # The pressure falls under the atmospheric pressure before the end of some ejections : the simulated flight stops
+    # (NaN samples) and only the samples before count, which are bounded with no dust nor time after them
+    dust = np.nan_to_num(thrust["Dust"], nan=0)
+    dt = np.zeros_like(time)
+    dt[:, 1:] = np.nan_to_num(np.diff(time, axis=1), nan=0)
+
+    # Velocity increments with the dust used by each step of calc_v_rocket
+    increments = np.zeros_like(time)
+    increments[:, 1:30] = dust[:, :29]/mass[:, 1:30]*dt[:, 1:30]
+    increments[:, 30:] = dust[:, 30:]/mass[:, 30:]*dt[:, 30:]
+    velocity = thrust["Ramp velocity"][:, None] + np.cumsum(increments, axis=1)
+    # The first coasting step still uses the last dust of the air ejection
+    burnout_velocity = velocity[:, -1] + dust[:, -1]/mass[:, -1]*dt[:, -1]
+    burnout_height = np.sum(velocity*dt, axis=1)
+
+    bound = burnout_height + burnout_velocity**2/(2*g) + burnout_velocity*COAST_STEP
+    return np.where(np.isnan(bound), -np.inf, bound)
+
+def top_k_designs(candidates, k:int=10, chunk_size:int=5000, **parameters) -> tuple :
+    """Function searching the k candidates with the highest apogee, simulating as few flights as possible
+
+    The candidates are sorted by apogee_upper_bound and simulated with simulate_batch by chunks, best bounds first.
+    A candidate whose bound cannot beat the current k-th best apogee is never simulated, and the search stops as
+    soon as the next bound is under it.
+
+    Args:
+        - candidates (DataFrame or dict): Constructor parameters of the candidates, one column (or 1D array) per parameter (see design_grid)
+        - k (int, optional): Number of designs to return. Defaults to 10.
+        - chunk_size (int, optional): Maximal number of flights simulated in one batch. Defaults to 5000.
+        - **parameters: Values of the constructor parameters shared by all the candidates
+
+    Returns:
+        - designs (DataFrame): Rows of the k best candidates (with their original index) with the columns "apogee" and "apogee_bound", sorted by decreasing apogee
+        - report (dict): "candidates", "simulated" and "skipped" numbers of flights
+    """
+    if not isinstance(candidates, pd.DataFrame) :
+        candidates = pd.DataFrame(candidates)
+    n = len(candidates)
+    values = {name : candidates[name].to_numpy(dtype=float) for name in candidates.columns}
+
+    def chunk_parameters(index) :
+        return {**parameters, **{name : value[index] for name, value in values.items()}}
+
+    bound = np.empty(n)
+    with np.errstate(all='ignore') :
+        for start in range(0, n, chunk_size) :
+            index = np.arange(start, min(start + chunk_size, n))
+            bound[index] = apogee_upper_bound(**chunk_parameters(index))
+
+    order = np.argsort(-bound, kind='stable')
+    order = order[bound[order] > -np.inf]
+    best_index, best_apogee = np.empty(0, dtype=int), np.empty(0)
+    simulated = 0
+    position = 0
+    # Small first batches to find a good k-th best quickly, then larger ones
+    size = max(k, 1)
+    while position < len(order) :
+        threshold = best_apogee[-1] if len(best_apogee) >= k else -np.inf
+        index = order[position:position + size]
+        index = index[bound[index] > threshold]
+        if len(index) == 0 :
+            break
+        with np.errstate(all='ignore') :
+            apogee = summarize_batch(simulate_batch(**chunk_parameters(index)))["apogee"]
+        simulated += len(index)
+        position += size
+        size = min(2*size, chunk_size)
+
+        best_index = np.concatenate((best_index, index))
+        best_apogee = np.concatenate((best_apogee, np.nan_to_num(apogee, nan=-np.inf)))
+        kept = np.argsort(-best_apogee, kind='stable')[:k]
+        best_index, best_apogee = best_index[kept], best_apogee[kept]
+
+    designs = candidates.iloc[best_index].copy()
+    designs["apogee"] = best_apogee
+    designs["apogee_bound"] = bound[best_index]
+    report = {"candidates" : n, "simulated" : simulated, "skipped" : n - simulated}
+    return designs, report
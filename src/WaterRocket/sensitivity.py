@@ -0,0 +1,60 @@
+__author__ = "Mohamed Nennouche"
+__copyright__ = "Copyright 20XX, WaterRocketPy Team"
+__license__ = "MIT"
+
+import numpy as np
+import pandas as pd
+
+from .batch import DEFAULT_PARAMETERS, batch_parameters, simulate_batch, summarize_batch
+
+
+def sensitivities(
+    rockets:list,
+    outputs:list=None,
+    parameters:list=None,
+    relative_step:float=1e-4) -> pd.DataFrame :
+    """Function computing the local sensitivities (Jacobian) of the flight highlights with respect to the constructor parameters
+
+    The derivatives are estimated by central differences. All the perturbed copies of the designs (2 per parameter)
+    are simulated together in a single call to simulate_batch.
+
+    Args:
+        - rockets (list): WaterRocket objects (baseline designs)
+        - outputs (list, optional): Names of the highlights to derive (see summarize_batch). Defaults to ["apogee", "range"].
+        - parameters (list, optional): Names of the constructor parameters. Defaults to all of them.
+        - relative_step (float, optional): Step of the central differences relative to the parameter value (absolute step for parameters equal to zero). Defaults to 1e-4.
+
+    Returns:
+        - jacobian (DataFrame): Pandas DataFrame indexed by (rocket, output) with one column per parameter, containing d output / d parameter in the units of the constructor (NaN when a perturbed flight could not be simulated)
+    """
+    if outputs is None :
+        outputs = ["apogee", "range"]
+    if parameters is None :
+        parameters = list(DEFAULT_PARAMETERS)
+    base = batch_parameters(rockets)
+    n_rockets, n_parameters = len(rockets), len(parameters)
+
+    # For each parameter a block of +h perturbations followed by a block of -h perturbations
+    perturbed = {name : np.tile(values, 2*n_parameters) for name, values in base.items()}
+    steps = dict()
+    for j, name in enumerate(parameters) :
+        steps[name] = relative_step*np.where(base[name] != 0, np.abs(base[name]), 1)
+        plus = slice(2*j*n_rockets, (1 + 2*j)*n_rockets)
+        minus = slice((1 + 2*j)*n_rockets, (2 + 2*j)*n_rockets)
+        perturbed[name][plus] += steps[name]
+        perturbed[name][minus] -= steps[name]
+    data = simulate_batch(**perturbed)
+    summary = summarize_batch(data)
+    # A flight cut by NaN samples gives meaningless highlights
+    valid = np.isfinite(data["Time"]).all(axis=1) & np.isfinite(data["y"]).all(axis=1)
+
+    jacobian = np.empty((n_rockets, len(outputs), n_parameters))
+    for k, output in enumerate(outputs) :
+        values = np.where(valid, summary[output], np.nan)
+        for j, name in enumerate(parameters) :
+            plus = values[2*j*n_rockets:(1 + 2*j)*n_rockets]
+            minus = values[(1 + 2*j)*n_rockets:(2 + 2*j)*n_rockets]
+            jacobian[:, k, j] = (plus - minus)/(2*steps[name])
+
+    index = pd.MultiIndex.from_product([range(n_rockets), outputs], names=["rocket", "output"])
+    return pd.DataFrame(jacobian.reshape(n_rockets*len(outputs), n_parameters), index=index, columns=parameters)
@@ -0,0 +1,263 @@
+__author__ = "Mohamed Nennouche"
+__copyright__ = "Copyright 20XX, WaterRocketPy Team"
+__license__ = "MIT"
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["Air volume","Air pressure","Time","Ejection velocity","Dust","Rocket mass","Tilt","Rocket velocity","Air resistance","x","y","Acceleration"]
+
+# Last sample of the water ejection and of the air ejection
+WATER_END_SAMPLE = 29
+AIR_END_SAMPLE = 49
+
+
+class FlightTrajectory :
+
+    def __init__(self, flights) -> None :
+        """Constructor of the FlightTrajectory class, an index over one or many simulated flights answering time and crossing queries by binary search
+
+        The time samples of all the flights are stored in one sorted array (each flight shifted by its own offset),
+        so a query for many points of many flights is a single np.searchsorted call.
+
+        Args:
+            - flights (WaterRocket, list, DataFrame or dict): A WaterRocket, a list of WaterRocket, a DataFrame of create_df or the output of simulate_batch
+        """
+        if isinstance(flights, pd.DataFrame) :
+            data = {column : flights[column].to_numpy(dtype=float)[None, :] for column in flights.columns if column in COLUMNS}
+        elif isinstance(flights, dict) :
+            data = {column : np.atleast_2d(np.asarray(values, dtype=float)) for column, values in flights.items() if column in COLUMNS}
+        else :
+            if not isinstance(flights, (list, tuple)) :
+                flights = [flights]
+            data = {column : list() for column in COLUMNS}
+            for rocket in flights :
+                rocket.calc_all_caracteristics()
+                values = [rocket.air_volume, rocket.air_pressure, rocket.time, rocket.ejection_velocity, rocket.dust, rocket.rocket_mass, rocket.rampe_tilt, rocket.v_rocket, rocket.air_resistance, rocket.x, rocket.y, rocket.acceleration_y]
+                for column, value in zip(COLUMNS, values) :
+                    data[column].append(value)
+            data = {column : np.array(values, dtype=float) for column, values in data.items()}
+
+        self.columns = [column for column in COLUMNS if column in data]
+        time, y = data["Time"], data["y"]
+        self.n_flights, n_samples = time.shape
+        rows = np.arange(self.n_flights)
+
+        # Samples of the flight : up to the first sample under the ground (included, to interpolate the landing)
+        in_flight = np.isfinite(time) & (y >= 0)
+        first_out = np.where(in_flight.all(axis=1), n_samples, np.argmin(in_flight, axis=1))
+        landed = first_out < n_samples
+        landed &= np.isfinite(time[rows, np.minimum(first_out, n_samples - 1)])
+        self.n_samples = np.where(landed, first_out + 1, first_out)
+
+        # Values after the end of each flight are padded with the last value to keep the running envelopes sorted
+        padding = np.arange(n_samples)[None, :] >= self.n_samples[:, None]
+        last = np.maximum(self.n_samples - 1, 0)
+        self.data = {column : np.where(padding, values[rows, last][:, None], values) for column, values in data.items()}
+        self.time = self.data["Time"]
+
+        # Events of the flight
+        last_y = self.data["y"][rows, last]
+        previous = np.maximum(last - 1, 0)
+        with np.errstate(divide='ignore', invalid='ignore') :
+            fraction = np.where(landed, self.data["y"][rows, previous]/(self.data["y"][rows, previous] - last_y), 1)
+        landing_time = np.where(landed, self.time[rows, previous] + fraction*(self.time[rows, last] - self.time[rows, previous]), self.time[rows, last])
+        apogee = np.argmax(np.where(padding, -np.inf, self.data["y"]), axis=1)
+        self.events = {
+            "launch" : self.time[:, 0],
+            "water_end" : self.time[:, min(WATER_END_SAMPLE, n_samples - 1)],
+            "air_end" : self.time[:, min(AIR_END_SAMPLE, n_samples - 1)],
+            "apogee" : self.time[rows, apogee],
+            "landing" : landing_time
+        }
+
+        self._flat_time, self._time_offsets = self._flatten(self.time)
+        self._envelopes = dict()
+        self._runs_cache = dict()
+
+    def _flatten(self, values:np.ndarray) -> tuple :
+        """Flat sorted array of the rows of values (each one non decreasing) shifted by increasing offsets"""
+        span = np.nanmax(values) - np.nanmin(values) + 1 if values.size else 1
+        offsets = (np.arange(values.shape[0]) - values.shape[0]/2)*span
+        return (values + offsets[:, None]).ravel(), offsets
+
+    def _search(self, flat:np.ndarray, offsets:np.ndarray, queries:np.ndarray, side:str) -> np.ndarray :
+        """Indices (inside each flight) of queries of shape (number of flights, number of queries) in a flattened array"""
+        n_samples = self.time.shape[1]
+        index = np.searchsorted(flat, queries + offsets[:, None], side=side)
+        return index - np.arange(self.n_flights)[:, None]*n_samples
+
+    def _queries(self, values) -> np.ndarray :
+        """Broadcast query values to the shape (number of flights, number of queries)"""
+        values = np.asarray(values, dtype=float)
+        if values.ndim <= 1 :
+            values = np.broadcast_to(values.reshape(1, -1), (self.n_flights, values.size))
+        return values
+
+    def state_at(self, times, columns:list=None) -> dict :
+        """Function returning the state of the flights at any times (linear interpolation between the samples)
+
+        Args:
+            - times (float or array): Query times (in s), either shared by all flights (scalar or 1D) or one row per flight (2D)
+            - columns (list, optional): Columns to interpolate. Defaults to all columns.
+
+        Returns:
+            - state (dict): dict of arrays of shape (number of flights, number of queries), NaN outside of the flight
+        """
+        times = self._queries(times)
+        columns = self.columns if columns is None else columns
+        rows = np.arange(self.n_flights)[:, None]
+        # side='right' jumps over the duplicated samples at the phase boundaries
+        index = self._search(self._flat_time, self._time_offsets, times, side='right') - 1
+        index = np.clip(index, 0, np.maximum(self.n_samples - 2, 0)[:, None])
+        following = np.minimum(index + 1, np.maximum(self.n_samples - 1, 0)[:, None])
+        t0, t1 = self.time[rows, index], self.time[rows, following]
+        with np.errstate(divide='ignore', invalid='ignore') :
+            weight = np.where(t1 > t0, (times - t0)/(t1 - t0), 0)
+        outside = (times < self.events["launch"][:, None]) | (times > self.events["landing"][:, None])
+        state = dict()
+        for column in columns :
+            values = self.data[column]
+            state[column] = np.where(outside, np.nan, values[rows, index] + weight*(values[rows, following] - values[rows, index]))
+        return state
+
+    def event_time(self, event:str) -> np.ndarray :
+        """Function returning the time of a phase boundary of every flight
+
+        Args:
+            - event (str): "launch", "water_end", "air_end", "apogee" or "landing"
+
+        Returns:
+            - times (array): Time of the event (in s) for each flight
+        """
+        if event not in self.events :
+            raise ValueError("event must be one of {}".format(list(self.events)))
+        return self.events[event]
+
+    def event_state(self, event:str, columns:list=None) -> dict :
+        """Function returning the state of every flight at a phase boundary
+
+        Returns:
+            - state (dict): dict of arrays of shape (number of flights,)
+        """
+        times = self.event_time(event)
+        if event in ("water_end", "air_end") :
+            # Take the sample ending the phase rather than the duplicated sample opening the next one
+            sample = WATER_END_SAMPLE if event == "water_end" else AIR_END_SAMPLE
+            columns = self.columns if columns is None else columns
+            return {column : self.data[column][:, sample] for column in columns}
+        return {column : values[:, 0] for column, values in self.state_at(times[:, None], columns).items()}
+
+    def _envelope(self, column:str) -> tuple :
+        """Flattened running maximum and running minimum (negated) of a column, built on the first request"""
+        if column not in self._envelopes :
+            values = self.data[column]
+            self._envelopes[column] = (self._flatten(np.maximum.accumulate(values, axis=1)), self._flatten(-np.minimum.accumulate(values, axis=1)))
+        return self._envelopes[column]
+
+    def first_crossing(self, column:str, values) -> np.ndarray :
+        """Function returning the first time each flight reaches given values of a column
+
+        Args:
+            - column (str): Column name (e.g. "y")
+            - values (float or array): Values of the column, either shared by all flights (scalar or 1D) or one row per flight (2D)
+
+        Returns:
+            - times (array): Array of shape (number of flights, number of values), NaN when the value is never reached
+        """
+        values = self._queries(values)
+        (flat_max, offsets_max), (flat_min, offsets_min) = self._envelope(column)
+        data = self.data[column]
+        rows = np.arange(self.n_flights)[:, None]
+        start = data[:, :1]
+        # Going up the value is reached when the running maximum reaches it, going down the running minimum
+        index = np.where(values >= start,
+                        self._search(flat_max, offsets_max, values, side='left'),
+                        self._search(flat_min, offsets_min, -values, side='left'))
+        never = index >= self.n_samples[:, None]
+        index = np.clip(index, 1, np.maximum(self.n_samples - 1, 1)[:, None])
+        v0, v1 = data[rows, index - 1], data[rows, index]
+        t0, t1 = self.time[rows, index - 1], self.time[rows, index]
+        with np.errstate(divide='ignore', invalid='ignore') :
+            times = np.where(v1 != v0, t0 + (values - v0)/(v1 - v0)*(t1 - t0), t0)
+        times = np.where(values == start, self.time[:, :1], times)
+        return np.where(never, np.nan, times)
+
+    def _runs(self, column:str) -> dict :
+        """Monotonic runs of a column, built on the first request
+
+        Each run is oriented to be non decreasing (decreasing runs are negated) and shifted above the previous
+        one, so the runs of all the flights are stored in one sorted array.
+        """
+        if column in self._runs_cache :
+            return self._runs_cache[column]
+        values = self.data[column]
+        n_segments = values.shape[1] - 1
+        valid = np.arange(n_segments)[None, :] < (self.n_samples - 1)[:, None]
+        slopes = np.where(valid, np.nan_to_num(np.sign(np.diff(values, axis=1))), 0)
+        # Flat steps take the direction of the last non flat step (the first one for the leading flat steps)
+        last = np.maximum.accumulate(np.where(slopes != 0, np.arange(n_segments)[None, :], -1), axis=1)
+        last = np.where(last < 0, np.argmax(slopes != 0, axis=1)[:, None], last)
+        direction = np.take_along_axis(slopes, last, axis=1)
+        direction = np.where(direction == 0, 1, direction)
+        starts = valid.copy()
+        starts[:, 1:] &= direction[:, 1:] != direction[:, :-1]
+
+        flight, first = np.nonzero(starts)
+        end = np.append(first[1:] - 1, 0)
+        same_flight = np.append(flight[1:] == flight[:-1], False)
+        end = np.where(same_flight, end, self.n_samples[flight] - 2)
+        length = end - first + 2
+        run_direction = direction[flight, first]
+
+        # Samples of every run, one after the other
+        position = np.concatenate(([0], np.cumsum(length)[:-1]))
+        samples = np.arange(length.sum()) - np.repeat(position, length) + np.repeat(first, length)
+        oriented = np.repeat(run_direction, length)*values[np.repeat(flight, length), samples]
+        low = np.minimum.reduceat(oriented, position) if len(length) else np.empty(0)
+        high = np.maximum.reduceat(oriented, position) if len(length) else np.empty(0)
+        base = np.concatenate(([0], np.cumsum(high - low + 1)[:-1]))
+        shift = base - low
+        self._runs_cache[column] = {
+            "flat" : oriented + np.repeat(shift, length),
+            "flight" : flight, "first" : first, "length" : length, "position" : position,
+            "direction" : run_direction, "low" : low, "high" : high, "shift" : shift
+        }
+        return self._runs_cache[column]
+
+    def all_crossings(self, column:str, values) -> list :
+        """Function returning all the times each flight crosses values of a column
+
+        The column is split once in monotonic runs (see _runs) and each value is searched by bisection in every run
+        containing it, for all the runs and values at once.
+
+        Args:
+            - column (str): Column name (e.g. "y")
+            - values (float or array): Value or 1D array of values of the column
+
+        Returns:
+            - times (list): One sorted array of crossing times per flight for a single value, or per flight one such array per value
+        """
+        scalar = np.ndim(values) == 0
+        values = np.atleast_1d(np.asarray(values, dtype=float))
+        runs = self._runs(column)
+        data = self.data[column]
+        flight, direction = runs["flight"][:, None], runs["direction"][:, None]
+        keys = direction*values[None, :]
+        inside = (keys >= runs["low"][:, None]) & (keys <= runs["high"][:, None])
+        index = np.searchsorted(runs["flat"], keys + runs["shift"][:, None], side='left') - runs["position"][:, None]
+        index = np.clip(index, 1, runs["length"][:, None] - 1) + runs["first"][:, None]
+        v0, v1 = direction*data[flight, index - 1], direction*data[flight, index]
+        t0, t1 = self.time[flight, index - 1], self.time[flight, index]
+        with np.errstate(divide='ignore', invalid='ignore') :
+            times = np.where(v1 != v0, t0 + (keys - v0)/(v1 - v0)*(t1 - t0), t0)
+        times = np.where(inside, times, np.nan)
+
+        # The value reached at the end of a run is also found at the start of the next one
+        bounds = np.searchsorted(runs["flight"], np.arange(self.n_flights + 1))
+        result = list()
+        for i in range(self.n_flights) :
+            flight_times = times[bounds[i]:bounds[i + 1]]
+            crossings = [np.unique(flight_times[:, j][~np.isnan(flight_times[:, j])]) for j in range(len(values))]
+            result.append(crossings[0] if scalar else crossings)
+        return result
@@ -19,6 +19,50 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
 from tabulate import tabulate
 import codecs
 
+from .trajectory import FlightTrajectory
+from .animation import animate_flight
+
+# Attribute holding each column of create_df, the calc_* stage computing it and the columns this stage needs
+COLUMN_STAGES = {
+    "Air volume" : ("air_volume", "calc_air_volume", []),
+    "Air pressure" : ("air_pressure", "calc_pressure", ["Air volume"]),
+    "Time" : ("time", "calc_time", ["Air volume", "Ejection velocity"]),
+    "Ejection velocity" : ("ejection_velocity", "calc_ejection_velocity", ["Air pressure"]),
+    "Dust" : ("dust", "calc_dust", ["Ejection velocity"]),
+    "Rocket mass" : ("rocket_mass", "calc_mass", ["Air volume"]),
+    "Tilt" : ("rampe_tilt", "calc_tilt_velocity_res", ["Time", "Air volume", "Dust"]),
+    "Rocket velocity" : ("v_rocket", "calc_tilt_velocity_res", ["Time", "Air volume", "Dust"]),
+    "Air resistance" : ("air_resistance", "calc_tilt_velocity_res", ["Time", "Air volume", "Dust"]),
+    "x" : ("x", "calc_x_y", ["Tilt", "Rocket velocity", "Time"]),
+    "y" : ("y", "calc_x_y", ["Tilt", "Rocket velocity", "Time"]),
+    "Acceleration" : ("acceleration_y", "calc_accel", ["Rocket velocity", "Time"])
+}
+
+
+def resolve_stages(columns:list) -> list :
+    """Function resolving the minimal ordered list of calc_* stages needed to compute some columns of create_df
+
+    Args:
+        - columns (list): Names of the columns
+
+    Returns:
+        - stages (list): Names of the calc_* methods, each stage coming after the stages it depends on
+    """
+    stages = list()
+
+    def visit(column) :
+        if column not in COLUMN_STAGES :
+            raise ValueError("Unknown column '{}', the columns are {}".format(column, list(COLUMN_STAGES)))
+        _, stage, dependencies = COLUMN_STAGES[column]
+        for dependency in dependencies :
+            visit(dependency)
+        if stage not in stages :
+            stages.append(stage)
+
+    for column in columns :
+        visit(column)
+    return stages
+
 
 def create_style(styleName, 
                     fontName:str='Helvetica', 
@@ -75,6 +119,23 @@ class WaterRocket :
             - Patm (float, optional): Atmospheric pressure (in Pascal). Defaults to 101325.
         """
 
+        # Constructor parameters as given by the user (before unit conversions)
+        self.flight_parameters = {
+            "bottle_volume" : bottle_volume,
+            "d_bottle" : d_bottle,
+            "d_output" : d_output,
+            "m_empty_rocket" : m_empty_rocket,
+            "Cx" : Cx,
+            "tilt_angle" : tilt_angle,
+            "length_rampe" : length_rampe,
+            "initial_pressure" : initial_pressure,
+            "initial_water_volume" : initial_water_volume,
+            "g" : g,
+            "r" : r,
+            "ra" : ra,
+            "Patm" : Patm
+        }
+
         #Initialization of constants
         self.g = g
         self.r = r
@@ -173,6 +234,9 @@ class WaterRocket :
 
             for i in range(50) : 
                 self.air_pressure.append(((self.initial_pressure + self.p_atm)*(self.bottle_volume-self.initial_water_volume)/self.air_volume[i])-self.p_atm)
+            # The last sample of the air ejection is at the atmospheric pressure : rounding errors can make it
+            # slightly negative, which would give a NaN ejection velocity and time
+            self.air_pressure[49] = max(self.air_pressure[49], 0)
             for i in range(549) :
                 self.air_pressure.append(0)
         return self.air_pressure
@@ -432,12 +496,39 @@ class WaterRocket :
         
         return self.air_volume, self.air_pressure, self.ejection_velocity, self.time, self.dust, self.rocket_mass, self.rampe_tilt, self.v_rocket, self.air_resistance, self.x, self.y, self.acceleration_y
     
-    def create_df(self, save_as_CSV:bool=True) -> pd.DataFrame :
+    def trajectory(self) -> FlightTrajectory :
+        """Function returning the trajectory index of the flight, to query the state at any time, the crossing times of any column and the phase boundaries
+
+        Returns:
+            - trajectory (FlightTrajectory): Index over the simulated flight
+        """
+        return FlightTrajectory(self)
+
+    def create_df(self, save_as_CSV:bool=True, columns:list=None) -> pd.DataFrame :
         """Function calculating all caracteristics of the rocket flight and create Pandas DataFrame
 
+        Args:
+            - save_as_CSV (bool, optional): Define if you would save the DataFrame as "Rocket_data.csv" or not. Defaults to True.
+            - columns (list or str, optional): Columns to compute, only the calc_* stages they need are run (see resolve_stages). Defaults to None (all columns).
+
         Returns: 
-        - self.rocket_data (Dataframe): Pandas Dataframe containing all caracteristics of the flight
+        - self.rocket_data (Dataframe): Pandas Dataframe containing all caracteristics of the flight (or only the requested columns). The samples under the ground are removed when the requested columns need the trajectory (calc_x_y)
         """
+        if columns is not None :
+            if isinstance(columns, str) :
+                columns = [columns]
+            # The stages already computed return immediately
+            stages = resolve_stages(columns)
+            for stage in stages :
+                getattr(self, stage)()
+            data = pd.DataFrame({column : getattr(self, COLUMN_STAGES[column][0]) for column in columns})
+            # Mask (only for the columns of the trajectory, the propulsion columns keep their 599 samples)
+            if "calc_x_y" in stages :
+                data = data[np.array(self.y)>=0]
+            if save_as_CSV :
+                data.to_csv("Rocket_data.csv",index=False)
+            return data
+
         self.calc_all_caracteristics()
         if len(self.rocket_data) == 0 :
             data = np.array([self.air_volume, self.air_pressure, self.time, self.ejection_velocity, self.dust, self.rocket_mass, self.rampe_tilt, self.v_rocket, self.air_resistance, self.x, self.y, self.acceleration_y]).T
@@ -455,7 +546,7 @@ class WaterRocket :
         Args:
             save_fig (bool, optional): Define if you would save the image of plot or not. Defaults to False.
         """
-        data = self.create_df(save_as_CSV=False)
+        data = self.create_df(save_as_CSV=False, columns=["x", "y", "Rocket velocity", "Dust", "Acceleration", "Air resistance"])
 
         plt.figure(figsize=(16,6))
         plt.plot(data["x"],data["y"], label="Flight path")
@@ -488,7 +579,7 @@ class WaterRocket :
         Args:
             save_fig (bool, optional): Define if you would save the image of plot or not. Defaults to False.
         """
-        data = self.create_df(save_as_CSV=False)
+        data = self.create_df(save_as_CSV=False, columns=["x", "y"])
 
         plt.figure(figsize=(16,6))
         font = {'family': 'sans-serif',
@@ -517,7 +608,7 @@ class WaterRocket :
         Args:
             save_fig (bool, optional): Define if you would save the image of plot or not. Defaults to False.
         """
-        data = self.create_df(save_as_CSV=False)
+        data = self.create_df(save_as_CSV=False, columns=["x", "y", "Rocket velocity"])
 
         plt.figure(figsize=(16,6))
         font = {'family': 'sans-serif',
@@ -548,7 +639,7 @@ class WaterRocket :
         Args:
             save_fig (bool, optional): Define if you would save the image of plot or not. Defaults to False.
         """
-        data = self.create_df(save_as_CSV=False)
+        data = self.create_df(save_as_CSV=False, columns=["Time", "x", "y", "Rocket velocity"])
 
         plt.figure(figsize=(16,6))
         font = {'family': 'sans-serif',
@@ -579,7 +670,7 @@ class WaterRocket :
         Args:
             save_fig (bool, optional): Define if you would save the image of plot or not. Defaults to False.
         """
-        data = self.create_df(save_as_CSV=False)
+        data = self.create_df(save_as_CSV=False, columns=["Time", "Dust"])
         plt.figure(figsize=(16,6))
         font = {'family': 'sans-serif',
             'color':  'black',
@@ -606,7 +697,7 @@ class WaterRocket :
         Args:
             save_fig (bool, optional): Define if you would save the image of plot or not. Defaults to False.
         """
-        data = self.create_df(save_as_CSV=False)
+        data = self.create_df(save_as_CSV=False, columns=["Time", "Dust"])
         plt.figure(figsize=(16,6))
         font = {'family': 'sans-serif',
             'color':  'black',
@@ -634,7 +725,7 @@ class WaterRocket :
         Args:
             save_fig (bool, optional): Define if you would save the image of plot or not. Defaults to False.
         """
-        data = self.create_df(save_as_CSV=False)
+        data = self.create_df(save_as_CSV=False, columns=["Time", "Ejection velocity"])
         plt.figure(figsize=(16,6))
         font = {'family': 'sans-serif',
             'color':  'black',
@@ -658,7 +749,7 @@ class WaterRocket :
         Args:
             save_fig (bool, optional): Define if you would save the image of plot or not. Defaults to False.
         """
-        data = self.create_df(save_as_CSV=False)
+        data = self.create_df(save_as_CSV=False, columns=["Time", "Ejection velocity"])
         plt.figure(figsize=(16,6))
         font = {'family': 'sans-serif',
             'color':  'black',
@@ -684,6 +775,7 @@ class WaterRocket :
             save_fig (bool, optional): Define if you would save the image of plot or not. Defaults to False.
         """
         data_rocket = self.create_df(save_as_CSV=False)
+        trajectory = self.trajectory()
         font = {'family': 'sans-serif',
             'color':  'black',
             'weight': 'bold',
@@ -699,9 +791,9 @@ class WaterRocket :
             ["Maximal air resistance (N)", data_rocket["Air resistance"].max()],
             ['Apogee (m)', data_rocket["y"].max()],
             ['Maximum extent (m)', data_rocket["x"].max()],
-            ["Duration of water ejection (s)", data_rocket["Time"].loc[29]],
-            ["Duration of air ejection (s)", data_rocket["Time"].loc[49]-data_rocket["Time"].loc[29]],
-            ["Total flight time (s)", data_rocket["Time"].loc[206]]
+            ["Duration of water ejection (s)", trajectory.event_time("water_end")[0]],
+            ["Duration of air ejection (s)", trajectory.event_time("air_end")[0]-trajectory.event_time("water_end")[0]],
+            ["Total flight time (s)", trajectory.event_time("landing")[0]]
         ]
 
         column_headers = data.pop(0)
@@ -755,10 +847,25 @@ class WaterRocket :
         self.graphic_ejection_air(save_fig=save_fig, show_figure=show_figure)
         self.graphic_highlight_table(save_fig=save_fig, show_figure=show_figure)
 
+    def animate(self, path:str=None, fps:int=25, format:str=None, **options) :
+        """Function that generates the animated replay of the flight path with velocity and thrust readouts
+
+        Args:
+            - path (str, optional): Path of the GIF or MP4 file, None to return the animation as bytes. Defaults to None.
+            - fps (int, optional): Number of frames per second. Defaults to 25.
+            - format (str, optional): "gif" or "mp4" (MP4 needs ffmpeg). Defaults to the extension of path, or "gif".
+            - **options: speed, figsize and dpi of the replay (see animation.render_frames)
+
+        Returns:
+            - content (bytes): The encoded animation if path is None
+        """
+        return animate_flight(self, path=path, fps=fps, format=format, **options)
+
     def show_flight_infos(self, save_in_text=False, path_to_text="flight_info.txt") : 
         """Function showing all informations about the flight
         """
         self.create_df(save_as_CSV=False)
+        trajectory = self.trajectory()
         # Flight informations
         header = ['Quantity', 'Value']
         enviro_info = [
@@ -788,9 +895,9 @@ class WaterRocket :
             ["Maximal air resistance (N)", self.rocket_data["Air resistance"].max()],
             ['Apogee (m)', self.rocket_data["y"].max()],
             ['Maximum extent (m)', self.rocket_data["x"].max()],
-            ["Duration of water ejection (s)", self.rocket_data["Time"].loc[29]],
-            ["Duration of air ejection (s)", self.rocket_data["Time"].loc[49]-self.rocket_data["Time"].loc[29]],
-            ["Total flight time (s)", self.rocket_data["Time"].loc[206]]
+            ["Duration of water ejection (s)", trajectory.event_time("water_end")[0]],
+            ["Duration of air ejection (s)", trajectory.event_time("air_end")[0]-trajectory.event_time("water_end")[0]],
+            ["Total flight time (s)", trajectory.event_time("landing")[0]]
         ]
 
         print(" Environment informations ".center(80, '*'))
@@ -836,6 +943,9 @@ class WaterRocket :
         ## Template
         # Generate data
         data = self.create_df(save_as_CSV=False)
+        trajectory = self.trajectory()
+        water_end = trajectory.event_state("water_end", ["x", "y"])
+        air_end = trajectory.event_state("air_end", ["x", "y"])
         # Generate images
         self.graphic_all(save_fig=True)
         # Generate PDF
@@ -860,9 +970,9 @@ class WaterRocket :
 
         item3 = Paragraph("The maximum acceleration is <b>{:3.4f} m/s² </b> and corresponds to the coordinates :<br /><b>&nbsp;&nbsp;&nbsp;&nbsp;x = {:3.4f} m<br />&nbsp;&nbsp;&nbsp;&nbsp;y = {:3.4f} m</b>".format(data["Acceleration"].max(),data["x"].loc[data["Acceleration"].argmax()],data["y"].loc[data["Acceleration"].argmax()]), style=myPara, bulletText='-')
 
-        item4 = Paragraph("The coordinates of the end of the water ejection :<br /><b>&nbsp;&nbsp;&nbsp;&nbsp;x = {:3.4f} m<br />&nbsp;&nbsp;&nbsp;&nbsp;y = {:3.4f} m</b>".format(data["x"].loc[29],data["y"].loc[29]), style=myPara, bulletText='-')
+        item4 = Paragraph("The coordinates of the end of the water ejection :<br /><b>&nbsp;&nbsp;&nbsp;&nbsp;x = {:3.4f} m<br />&nbsp;&nbsp;&nbsp;&nbsp;y = {:3.4f} m</b>".format(water_end["x"][0],water_end["y"][0]), style=myPara, bulletText='-')
 
-        item5 = Paragraph("The coordinates of the end of the air ejection :<br /><b>&nbsp;&nbsp;&nbsp;&nbsp;x = {:3.4f} m<br />&nbsp;&nbsp;&nbsp;&nbsp;y = {:3.4f} m</b>".format(data["x"].loc[49],data["y"].loc[49]), style=myPara, bulletText='-')
+        item5 = Paragraph("The coordinates of the end of the air ejection :<br /><b>&nbsp;&nbsp;&nbsp;&nbsp;x = {:3.4f} m<br />&nbsp;&nbsp;&nbsp;&nbsp;y = {:3.4f} m</b>".format(air_end["x"][0],air_end["y"][0]), style=myPara, bulletText='-')
 
         item6 = Paragraph("The coordinates of the apogee are :<br /><b>&nbsp;&nbsp;&nbsp;&nbsp;x = {:3.4f} m<br />&nbsp;&nbsp;&nbsp;&nbsp;y = {:3.4f} m</b>".format(data["x"].loc[data["y"].argmax()],data["y"].loc[data["y"].argmax()]), style=myPara, bulletText='-')
 
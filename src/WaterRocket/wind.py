@@ -0,0 +1,273 @@
+__author__ = "Mohamed Nennouche"
+__copyright__ = "Copyright 20XX, WaterRocketPy Team"
+__license__ = "MIT"
+
+import numpy as np
+import matplotlib.pyplot as plt
+import os
+
+from .batch import batch_parameters, simulate_thrust_batch
+
+# Heights (in m) of the wind profiles built by wind_ensemble
+DEFAULT_HEIGHTS = [0, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+# International standard atmosphere (troposphere) : temperature gradient over ground temperature (1/m) and density exponent
+ISA_LAPSE_RATIO = 0.0065/288.15
+ISA_DENSITY_EXPONENT = 4.2559
+
+
+def air_density(z, ra:float=1.2) :
+    """Function computing the air density at a height with the international standard atmosphere
+
+    Args:
+        - z (float or array): Height above the launch pad (in m)
+        - ra (float or array, optional): Air density at the launch pad (in kg/m³). Defaults to 1.2.
+
+    Returns:
+        - density (float or array): Air density (in kg/m³)
+    """
+    return ra*(1 - ISA_LAPSE_RATIO*np.maximum(z, 0))**ISA_DENSITY_EXPONENT
+
+def wind_ensemble(
+    n_winds:int=1000,
+    speed:float=5,
+    speed_std:float=2,
+    direction:float=270,
+    direction_std:float=30,
+    heights:list=None,
+    reference_height:float=10,
+    exponent:float=1/7,
+    seed:int=None) -> tuple :
+    """Function drawing random wind profiles following the power law of the atmospheric boundary layer
+
+    Args:
+        - n_winds (int, optional): Number of wind profiles. Defaults to 1000.
+        - speed (float, optional): Mean wind speed at the reference height (in m/s). Defaults to 5.
+        - speed_std (float, optional): Standard deviation of the wind speed (in m/s). Defaults to 2.
+        - direction (float, optional): Mean direction the wind comes from (in degrees, clockwise from the north). Defaults to 270 (west wind).
+        - direction_std (float, optional): Standard deviation of the direction (in degrees). Defaults to 30.
+        - heights (list, optional): Heights of the profiles (in m). Defaults to DEFAULT_HEIGHTS.
+        - reference_height (float, optional): Height of the wind speed measurement (in m). Defaults to 10.
+        - exponent (float, optional): Exponent of the power law (1/7 for an open field). Defaults to 1/7.
+        - seed (int, optional): Seed of the random generator. Defaults to None.
+
+    Returns:
+        - heights (array): Heights of the profiles (in m)
+        - winds (array): Array of shape (n_winds, number of heights, 2) with the east and north components of the wind (in m/s)
+    """
+    if heights is None :
+        heights = DEFAULT_HEIGHTS
+    rng = np.random.default_rng(seed)
+    heights = np.asarray(heights, dtype=float)
+    speeds = np.maximum(rng.normal(speed, speed_std, n_winds), 0)
+    directions = rng.normal(direction, direction_std, n_winds)*np.pi/180
+    profile = (np.maximum(heights, 0)/reference_height)**exponent
+    # The wind blows towards the opposite of the direction it comes from
+    winds = np.empty((n_winds, len(heights), 2))
+    winds[:, :, 0] = -(speeds*np.sin(directions))[:, None]*profile[None, :]
+    winds[:, :, 1] = -(speeds*np.cos(directions))[:, None]*profile[None, :]
+    return heights, winds
+
+def simulate_wind_batch(
+    heights,
+    winds,
+    azimuth=0,
+    rocket=None,
+    dt:float=0.05,
+    max_time:float=120,
+    density=air_density,
+    keep_trajectory:bool=False,
+    **parameters) -> dict :
+    """Function simulating 3D flights in an ensemble of wind profiles, all the scenarios in one vectorized run
+
+    The propulsion comes from simulate_thrust_batch. The rocket leaves the launch ramp along its tilt angle and
+    azimuth, then the dust pushes along the velocity relative to the air (the rocket turns into the wind) and the
+    air resistance opposes the velocity relative to the air with the density of the local height. The coasting
+    phase is integrated with a fixed time step until every rocket has landed.
+
+    Args:
+        - heights (array): Heights of the wind profiles (in m, increasing), the wind is constant above and below them
+        - winds (array): Wind profiles, array of shape (number of scenarios, number of heights, 2) with the east and north components (in m/s), or (number of heights, 2) for a single wind
+        - azimuth (float or array, optional): Launch direction (in degrees, clockwise from the north), one value or one per scenario. Defaults to 0.
+        - rocket (WaterRocket, optional): Rocket giving the flight parameters. Defaults to None (default parameters).
+        - dt (float, optional): Time step of the coasting phase (in s). Defaults to 0.05.
+        - max_time (float, optional): Maximal duration of the coasting phase (in s). Defaults to 120.
+        - density (function, optional): Air density as a function of the height and of the density at the launch pad. Defaults to air_density.
+        - keep_trajectory (bool, optional): Define if the positions of every step are returned or not. Defaults to False.
+        - **parameters: Constructor parameters of WaterRocket given as scalars or 1D arrays (one value per scenario)
+
+    Returns:
+        - result (dict): dict of 1D arrays (one value per scenario) "landing_x" (east, in m), "landing_y" (north, in m), "landing_time" (s), "apogee" (m) and "drift" (distance from the launch pad, in m), NaN for the rockets that cannot leave the ramp. With keep_trajectory, arrays of shape (number of scenarios, number of steps) "Time", "x", "y" and "z", NaN after the landing
+    """
+    heights = np.asarray(heights, dtype=float)
+    winds = np.asarray(winds, dtype=float)
+    if winds.ndim == 2 :
+        winds = winds[None, :, :]
+    n = winds.shape[0]
+    if rocket is not None :
+        parameters = {**rocket.flight_parameters, **parameters}
+    p = {name : np.broadcast_to(value, n) for name, value in batch_parameters(**parameters).items()}
+    with np.errstate(invalid='ignore') :
+        thrust = simulate_thrust_batch(**p)
+    rows = np.arange(n)
+    section = (p["d_bottle"]**2)*np.pi/40000
+    drag_factor = 0.5*section*p["Cx"]
+    gravity = np.array([0, 0, -1.0])*p["g"][:, None]
+
+    tilt = p["tilt_angle"]*np.pi/180
+    azimuth = np.broadcast_to(np.asarray(azimuth, dtype=float)*np.pi/180, n)
+    launch_direction = np.column_stack((np.cos(tilt)*np.sin(azimuth), np.cos(tilt)*np.cos(azimuth), np.sin(tilt)))
+    position = np.zeros((n, 3))
+    velocity = launch_direction*thrust["Ramp velocity"][:, None]
+
+    def wind_at(z) :
+        """Wind (east and north components) of each scenario at the heights z"""
+        if len(heights) == 1 :
+            return winds[:, 0, :]
+        index = np.clip(np.searchsorted(heights, z, side='right') - 1, 0, len(heights) - 2)
+        weight = np.clip((z - heights[index])/(heights[index + 1] - heights[index]), 0, 1)[:, None]
+        return winds[rows, index]*(1 - weight) + winds[rows, index + 1]*weight
+
+    def step(position, velocity, dust, mass, dt) :
+        """Explicit Euler step (the new velocity moves the rocket, as in calc_x_y)"""
+        relative = velocity.copy()
+        relative[:, :2] -= wind_at(position[:, 2])
+        relative_speed = np.sqrt(np.sum(relative**2, axis=1))[:, None]
+        with np.errstate(divide='ignore', invalid='ignore') :
+            direction = np.where(relative_speed > 0, relative/relative_speed, launch_direction)
+        air_resistance = (drag_factor*density(position[:, 2], p["ra"]))[:, None]*relative_speed*relative
+        acceleration = (dust[:, None]*direction - air_resistance)/mass[:, None] + gravity
+        velocity = velocity + acceleration*dt[:, None]
+        return position + velocity*dt[:, None], velocity
+
+    flying = np.isfinite(velocity).all(axis=1)
+    landing = np.full((n, 3), np.nan)
+    landing_time = np.full(n, np.nan)
+    apogee = np.where(flying, 0, np.nan)
+    time = np.zeros(n)
+    trajectory = [(time, position)]
+    steps = thrust["Time"].shape[1] - 1 + int(np.ceil(max_time/dt))
+    dust = np.nan_to_num(thrust["Dust"], nan=0)
+    empty_mass = p["m_empty_rocket"]
+    coasting_dt = np.full(n, dt)
+    for i in range(steps) :
+        if i < thrust["Time"].shape[1] - 1 :
+            # Propulsion : the time steps and the dust of the ejections (calc_v_rocket uses the mass of the next sample)
+            step_dt = np.nan_to_num(thrust["Time"][:, i+1] - thrust["Time"][:, i], nan=0)
+            new_position, velocity = step(position, velocity, dust[:, i], thrust["Rocket mass"][:, i+1], step_dt)
+        else :
+            step_dt = coasting_dt
+            new_position, velocity = step(position, velocity, np.zeros(n), empty_mass, step_dt)
+        new_time = time + step_dt
+
+        landed = flying & (new_position[:, 2] < 0)
+        if landed.any() :
+            # Interpolation of the crossing of the ground
+            fraction = (position[landed, 2]/(position[landed, 2] - new_position[landed, 2]))[:, None]
+            landing[landed] = position[landed] + fraction*(new_position[landed] - position[landed])
+            landing_time[landed] = time[landed] + fraction[:, 0]*step_dt[landed]
+        flying &= ~landed
+        apogee = np.where(flying, np.maximum(apogee, new_position[:, 2]), apogee)
+        position, time = new_position, new_time
+        if keep_trajectory :
+            # The last point of a landed flight is its landing point
+            stored = np.where(flying[:, None], position, np.nan)
+            stored[landed] = landing[landed]
+            trajectory.append((np.where(landed, landing_time, time), stored))
+        if not flying.any() :
+            break
+
+    result = {
+        "landing_x" : landing[:, 0],
+        "landing_y" : landing[:, 1],
+        "landing_time" : landing_time,
+        "apogee" : apogee,
+        "drift" : np.sqrt(landing[:, 0]**2 + landing[:, 1]**2)
+    }
+    if keep_trajectory :
+        result["Time"] = np.column_stack([time for time, _ in trajectory])
+        for j, column in enumerate(("x", "y", "z")) :
+            result[column] = np.column_stack([position[:, j] for _, position in trajectory])
+    return result
+
+def safety_radius(result:dict, quantile:float=0.99, center:str="pad", return_counts:bool=False) :
+    """Function estimating the radius of the circle containing a given fraction of the landing points
+
+    The rockets that cannot leave the ramp are excluded. If a launched rocket has not landed at the end of the
+    simulation (see max_time of simulate_wind_batch), its landing point is unknown and the radius is infinite.
+
+    Args:
+        - result (dict): Output of simulate_wind_batch
+        - quantile (float or list, optional): Fraction of the landings inside the circle. Defaults to 0.99.
+        - center (str, optional): "pad" for a circle around the launch pad, "mean" around the mean landing point. Defaults to "pad".
+        - return_counts (bool, optional): Define if the numbers of flights are also returned or not. Defaults to False.
+
+    Returns:
+        - radius (float or array): Radius of the circle (in m), one per quantile
+        - counts (dict): "landed", "not_landed" (still flying at max_time) and "not_launched" (excluded) numbers of flights, only if return_counts is True
+    """
+    if center not in ("pad", "mean") :
+        raise ValueError("center must be 'pad' or 'mean'")
+    x, y = result["landing_x"], result["landing_y"]
+    launched = ~np.isnan(result["apogee"])
+    landed = ~(np.isnan(x) | np.isnan(y))
+    counts = {
+        "landed" : int(np.sum(landed)),
+        "not_landed" : int(np.sum(launched & ~landed)),
+        "not_launched" : int(np.sum(~launched))
+    }
+    if counts["not_landed"] > 0 or counts["landed"] == 0 :
+        radius = np.full(np.shape(quantile), np.inf) if np.ndim(quantile) else np.inf
+    else :
+        x, y = x[landed], y[landed]
+        if center == "mean" :
+            x, y = x - x.mean(), y - y.mean()
+        radius = np.quantile(np.sqrt(x**2 + y**2), quantile)
+    return (radius, counts) if return_counts else radius
+
+def graphic_landing_scatter(
+    result:dict,
+    quantiles:list=None,
+    save_fig:bool=False,
+    show_figure:bool=False) -> None :
+    """Function plotting the landing points of an ensemble of flights with the safety circles around the launch pad
+
+    Args:
+        - result (dict): Output of simulate_wind_batch
+        - quantiles (list, optional): Fractions of the landings of the safety circles. Defaults to [0.5, 0.9, 0.99].
+        - save_fig (bool, optional): Define if you would save the image of plot or not. Defaults to False.
+        - show_figure (bool, optional): Define if you would show the plot or not. Defaults to False.
+    """
+    if quantiles is None :
+        quantiles = [0.5, 0.9, 0.99]
+    x, y = result["landing_x"], result["landing_y"]
+    n_flights = int(np.sum(~np.isnan(x)))
+    plt.figure(figsize=(9,9))
+    ax = plt.gca()
+    font = {'family': 'sans-serif',
+        'color':  'black',
+        'weight': 'bold',
+        'size': 16,
+        }
+    plt.scatter(x, y, s=10 if n_flights < 1000 else 2, color=(0.25,0.25,0.5), alpha=0.5, label='Landing points', rasterized=n_flights > 2000)
+    plt.scatter([0], [0], marker="^", s=120, color=(0.9,0.4,0.5), label='Launch pad', zorder=3)
+    angles = np.linspace(0, 2*np.pi, 200)
+    radii, counts = safety_radius(result, quantiles, return_counts=True)
+    for quantile, radius in zip(quantiles, np.atleast_1d(radii)) :
+        if np.isfinite(radius) :
+            plt.plot(radius*np.cos(angles), radius*np.sin(angles), linestyle="--", label="{:.0f} % : {:.1f} m".format(100*quantile, radius))
+    ax.set_aspect('equal', adjustable='datalim')
+    plt.legend()
+    title = "Landing points of {} flights".format(n_flights)
+    if counts["not_landed"] > 0 :
+        title += " ({} still flying, no safety radius)".format(counts["not_landed"])
+    plt.title(title, fontdict=font)
+    plt.xlabel("East (m)", fontsize=14)
+    plt.ylabel("North (m)", fontsize=14)
+
+    if save_fig :
+        if not os.path.isdir("./img") :
+            os.mkdir("./img")
+        plt.savefig("./img/landing_scatter.png", bbox_inches='tight')
+    if show_figure :
+        plt.show()